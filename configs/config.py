@@ -13,6 +13,35 @@ from configs.constants import (
     LOGGING_TYPE_KEY,
     CACHE_TYPE_KEY,
     DEFAULT_CONFIG_VALUES, TRUE_VALUES, RELOADED_KEY,
+    MAX_CONNECTIONS_KEY,
+    ADMISSION_MAX_LOANS_KEY,
+    ADMISSION_MAX_BYTES_KEY,
+    ADMISSION_BATCH_SHARE_KEY,
+    ADMISSION_QUEUE_TIMEOUT_MS_KEY,
+    ADMISSION_MAX_WAITING_KEY,
+    ADMISSION_RETRY_AFTER_KEY,
+    CAPTURE_FILE_KEY,
+    CAPTURE_SAMPLE_PERCENT_KEY,
+    CAPTURE_ANONYMIZE_KEY,
+    CAPTURE_COMPRESS_KEY,
+    CAPTURE_MAX_BYTES_KEY,
+    CAPTURE_BACKUP_COUNT_KEY,
+    WORKERS_KEY,
+    RESULT_CACHE_SLOTS_KEY,
+    RESULT_CACHE_SLOT_BYTES_KEY,
+    TRACE_FILE_KEY,
+    TRACE_SAMPLE_PERCENT_KEY,
+    TRACE_BATCH_SIZE_KEY,
+    TRACE_FLUSH_INTERVAL_MS_KEY,
+    RATING_HISTORY_DB_KEY,
+    RATING_HISTORY_BATCH_SIZE_KEY,
+    RATING_HISTORY_FLUSH_INTERVAL_MS_KEY,
+    REQUEST_MEMORY_BUDGET_MB_KEY,
+    MEMORY_SAMPLE_PERCENT_KEY,
+    API_KEYS_FILE_KEY,
+    API_KEY_CACHE_TTL_S_KEY,
+    SCORING_ENGINE_CALIBRATION_FILE_KEY,
+    SCORING_ENGINE_CALIBRATE_KEY,
 )
 from utils.logger import project_logger
 
@@ -45,6 +74,67 @@ class Config:
         # Application-Specific Configurations
         self.CACHE_TYPE = self._get_config_value(CACHE_TYPE_KEY, default=DEFAULT_CONFIG_VALUES[CACHE_TYPE_KEY])
 
+        # Server capacity and admission control
+        self.MAX_CONNECTIONS = self._get_int(MAX_CONNECTIONS_KEY)
+        self.ADMISSION_MAX_LOANS = self._get_int(ADMISSION_MAX_LOANS_KEY)
+        self.ADMISSION_MAX_BYTES = self._get_int(ADMISSION_MAX_BYTES_KEY)
+        self.ADMISSION_BATCH_SHARE = self._get_int(ADMISSION_BATCH_SHARE_KEY)
+        self.ADMISSION_QUEUE_TIMEOUT_MS = self._get_int(ADMISSION_QUEUE_TIMEOUT_MS_KEY)
+        self.ADMISSION_MAX_WAITING = self._get_int(ADMISSION_MAX_WAITING_KEY)
+        self.ADMISSION_RETRY_AFTER = self._get_int(ADMISSION_RETRY_AFTER_KEY)
+
+        # Traffic capture (opt-in)
+        self.CAPTURE_FILE = self._get_config_value(CAPTURE_FILE_KEY, default=DEFAULT_CONFIG_VALUES[CAPTURE_FILE_KEY])
+        self.CAPTURE_SAMPLE_PERCENT = self._get_int(CAPTURE_SAMPLE_PERCENT_KEY)
+        self.CAPTURE_ANONYMIZE = self._get_config_value(CAPTURE_ANONYMIZE_KEY,
+                                                        default=DEFAULT_CONFIG_VALUES[CAPTURE_ANONYMIZE_KEY],
+                                                        is_boolean=True)
+        self.CAPTURE_COMPRESS = self._get_config_value(CAPTURE_COMPRESS_KEY,
+                                                       default=DEFAULT_CONFIG_VALUES[CAPTURE_COMPRESS_KEY],
+                                                       is_boolean=True)
+        self.CAPTURE_MAX_BYTES = self._get_int(CAPTURE_MAX_BYTES_KEY)
+        self.CAPTURE_BACKUP_COUNT = self._get_int(CAPTURE_BACKUP_COUNT_KEY)
+
+        # Worker processes and the result cache they share
+        self.WORKERS = self._get_int(WORKERS_KEY)
+        self.RESULT_CACHE_SLOTS = self._get_int(RESULT_CACHE_SLOTS_KEY)
+        self.RESULT_CACHE_SLOT_BYTES = self._get_int(RESULT_CACHE_SLOT_BYTES_KEY)
+
+        # Request tracing (opt-in)
+        self.TRACE_FILE = self._get_config_value(TRACE_FILE_KEY, default=DEFAULT_CONFIG_VALUES[TRACE_FILE_KEY])
+        self.TRACE_SAMPLE_PERCENT = self._get_int(TRACE_SAMPLE_PERCENT_KEY)
+        self.TRACE_BATCH_SIZE = self._get_int(TRACE_BATCH_SIZE_KEY)
+        self.TRACE_FLUSH_INTERVAL_MS = self._get_int(TRACE_FLUSH_INTERVAL_MS_KEY)
+
+        # Rating history (opt-in)
+        self.RATING_HISTORY_DB = self._get_config_value(RATING_HISTORY_DB_KEY,
+                                                        default=DEFAULT_CONFIG_VALUES[RATING_HISTORY_DB_KEY])
+        self.RATING_HISTORY_BATCH_SIZE = self._get_int(RATING_HISTORY_BATCH_SIZE_KEY)
+        self.RATING_HISTORY_FLUSH_INTERVAL_MS = self._get_int(RATING_HISTORY_FLUSH_INTERVAL_MS_KEY)
+
+        # Memory accounting
+        self.REQUEST_MEMORY_BUDGET_MB = self._get_int(REQUEST_MEMORY_BUDGET_MB_KEY)
+        self.MEMORY_SAMPLE_PERCENT = self._get_int(MEMORY_SAMPLE_PERCENT_KEY)
+
+        # Tenants and API keys (opt-in)
+        self.API_KEYS_FILE = self._get_config_value(API_KEYS_FILE_KEY, default=DEFAULT_CONFIG_VALUES[API_KEYS_FILE_KEY])
+        self.API_KEY_CACHE_TTL_S = self._get_int(API_KEY_CACHE_TTL_S_KEY)
+
+        # Scoring engines
+        self.SCORING_ENGINE_CALIBRATION_FILE = self._get_config_value(
+            SCORING_ENGINE_CALIBRATION_FILE_KEY, default=DEFAULT_CONFIG_VALUES[SCORING_ENGINE_CALIBRATION_FILE_KEY])
+        self.SCORING_ENGINE_CALIBRATE = self._get_config_value(
+            SCORING_ENGINE_CALIBRATE_KEY, default=DEFAULT_CONFIG_VALUES[SCORING_ENGINE_CALIBRATE_KEY], is_boolean=True)
+
+    def _get_int(self, key: str) -> int:
+        """
+        Shortcut for integer settings whose default lives in DEFAULT_CONFIG_VALUES.
+
+        :param key: The configuration key to look up.
+        :return: The configuration value.
+        """
+        return self._get_config_value(key, default=DEFAULT_CONFIG_VALUES[key], is_integer=True)
+
     def _get_config_value(self, key: str, default: Any, is_boolean: bool = False, is_integer: bool = False) -> Any:
         """
         Helper function to retrieve the config value from environment variables, config file, or fallback to defaults.
@@ -24,6 +24,35 @@ PORT_KEY = "PORT"
 LOGGING_TYPE_KEY = "LOGGING_TYPE"
 CACHE_TYPE_KEY = "CACHE_TYPE"
 RELOADED_KEY = "RELOADED"
+MAX_CONNECTIONS_KEY = "MAX_CONNECTIONS"
+ADMISSION_MAX_LOANS_KEY = "ADMISSION_MAX_LOANS"
+ADMISSION_MAX_BYTES_KEY = "ADMISSION_MAX_BYTES"
+ADMISSION_BATCH_SHARE_KEY = "ADMISSION_BATCH_SHARE"
+ADMISSION_QUEUE_TIMEOUT_MS_KEY = "ADMISSION_QUEUE_TIMEOUT_MS"
+ADMISSION_MAX_WAITING_KEY = "ADMISSION_MAX_WAITING"
+ADMISSION_RETRY_AFTER_KEY = "ADMISSION_RETRY_AFTER"
+CAPTURE_FILE_KEY = "CAPTURE_FILE"
+CAPTURE_SAMPLE_PERCENT_KEY = "CAPTURE_SAMPLE_PERCENT"
+CAPTURE_ANONYMIZE_KEY = "CAPTURE_ANONYMIZE"
+CAPTURE_COMPRESS_KEY = "CAPTURE_COMPRESS"
+CAPTURE_MAX_BYTES_KEY = "CAPTURE_MAX_BYTES"
+CAPTURE_BACKUP_COUNT_KEY = "CAPTURE_BACKUP_COUNT"
+WORKERS_KEY = "WORKERS"
+RESULT_CACHE_SLOTS_KEY = "RESULT_CACHE_SLOTS"
+RESULT_CACHE_SLOT_BYTES_KEY = "RESULT_CACHE_SLOT_BYTES"
+TRACE_FILE_KEY = "TRACE_FILE"
+TRACE_SAMPLE_PERCENT_KEY = "TRACE_SAMPLE_PERCENT"
+TRACE_BATCH_SIZE_KEY = "TRACE_BATCH_SIZE"
+TRACE_FLUSH_INTERVAL_MS_KEY = "TRACE_FLUSH_INTERVAL_MS"
+RATING_HISTORY_DB_KEY = "RATING_HISTORY_DB"
+RATING_HISTORY_BATCH_SIZE_KEY = "RATING_HISTORY_BATCH_SIZE"
+RATING_HISTORY_FLUSH_INTERVAL_MS_KEY = "RATING_HISTORY_FLUSH_INTERVAL_MS"
+REQUEST_MEMORY_BUDGET_MB_KEY = "REQUEST_MEMORY_BUDGET_MB"
+MEMORY_SAMPLE_PERCENT_KEY = "MEMORY_SAMPLE_PERCENT"
+API_KEYS_FILE_KEY = "API_KEYS_FILE"
+API_KEY_CACHE_TTL_S_KEY = "API_KEY_CACHE_TTL_S"
+SCORING_ENGINE_CALIBRATION_FILE_KEY = "SCORING_ENGINE_CALIBRATION_FILE"
+SCORING_ENGINE_CALIBRATE_KEY = "SCORING_ENGINE_CALIBRATE"
 
 # request
 POST = "POST"
@@ -38,7 +67,36 @@ DEFAULT_CONFIG_VALUES = {
     PORT_KEY: 5000,
     LOGGING_TYPE_KEY: "ERROR",
     CACHE_TYPE_KEY: "simple",
-    RELOADED_KEY: "false"
+    RELOADED_KEY: "false",
+    MAX_CONNECTIONS_KEY: 1000,  # Greenlets the gevent server runs at once; further connections wait in the backlog
+    ADMISSION_MAX_LOANS_KEY: 1_000_000,  # Loans being parsed and scored at once
+    ADMISSION_MAX_BYTES_KEY: 256 * 1024 * 1024,  # Request body bytes being processed at once
+    ADMISSION_BATCH_SHARE_KEY: 80,  # Percentage of the capacity batch requests may use
+    ADMISSION_QUEUE_TIMEOUT_MS_KEY: 2000,  # How long a request may wait for capacity before it is shed
+    ADMISSION_MAX_WAITING_KEY: 100,  # Requests waiting for capacity per priority class
+    ADMISSION_RETRY_AFTER_KEY: 1,  # Seconds suggested to shed clients
+    CAPTURE_FILE_KEY: "",  # Traffic capture file (JSONL); capture is off unless set
+    CAPTURE_SAMPLE_PERCENT_KEY: 100,  # Percentage of rating requests captured
+    CAPTURE_ANONYMIZE_KEY: True,  # Rescale and round amounts in captured mortgages, keeping their ratios
+    CAPTURE_COMPRESS_KEY: False,  # Gzip capture files when they are rotated
+    CAPTURE_MAX_BYTES_KEY: 100 * 1024 * 1024,  # Size at which the capture file is rotated
+    CAPTURE_BACKUP_COUNT_KEY: 5,  # Rotated capture files kept
+    WORKERS_KEY: 1,  # Worker processes forked by the gevent server; they share the listening socket
+    RESULT_CACHE_SLOTS_KEY: 4096,  # Entries of the shared-memory result cache; 0 disables it
+    RESULT_CACHE_SLOT_BYTES_KEY: 256,  # Size of one cache slot; larger results are not cached
+    TRACE_FILE_KEY: "",  # Finished traces are appended to this JSONL file; tracing is off unless set
+    TRACE_SAMPLE_PERCENT_KEY: 100,  # Percentage of requests traced
+    TRACE_BATCH_SIZE_KEY: 100,  # Traces written per batch
+    TRACE_FLUSH_INTERVAL_MS_KEY: 1000,  # Longest time a finished trace waits for its batch to be written
+    RATING_HISTORY_DB_KEY: "",  # SQLite file recording every rating; history is off unless set
+    RATING_HISTORY_BATCH_SIZE_KEY: 500,  # Ratings written per transaction
+    RATING_HISTORY_FLUSH_INTERVAL_MS_KEY: 1000,  # Longest time a rating waits for its batch to be written
+    REQUEST_MEMORY_BUDGET_MB_KEY: 256,  # Memory one rating request may be expected to use; 0 disables the budget
+    MEMORY_SAMPLE_PERCENT_KEY: 0,  # Percentage of requests whose peak allocations are measured
+    API_KEYS_FILE_KEY: "",  # Tenants and their API keys (.ini); requests are identified by IP address unless set
+    API_KEY_CACHE_TTL_S_KEY: 300,  # How long a verified API key is trusted without hashing it again
+    SCORING_ENGINE_CALIBRATION_FILE_KEY: "",  # Scoring engine crossovers measured by tools/calibrate_engines.py
+    SCORING_ENGINE_CALIBRATE_KEY: False,  # Measure the crossovers at startup (and write them to the file, if set)
 }
 TRUE_VALUES = {'true', '1', 't', 'y', 'yes'}
 USE_RELOADER = "use_reloader"
@@ -62,10 +120,12 @@ CREDIT_SCORE_MAX = 850
 # Loan Type Options
 LOAN_TYPE_FIXED = "fixed"
 LOAN_TYPE_ADJUSTABLE = "adjustable"
+LOAN_TYPES = (LOAN_TYPE_FIXED, LOAN_TYPE_ADJUSTABLE)  # A value's position is its code in the pool hash
 
 # Property Type Options
 PROPERTY_TYPE_SINGLE_FAMILY = "single_family"
 PROPERTY_TYPE_CONDO = "condo"
+PROPERTY_TYPES = (PROPERTY_TYPE_SINGLE_FAMILY, PROPERTY_TYPE_CONDO)  # A value's position is its code in the pool hash
 
 # Constants for Loan-to-Value Risk
 LTV_HIGH_THRESHOLD = 0.9
@@ -102,17 +162,335 @@ RATING_SCORE_BBB = 5
 RATING_AAA = "AAA"
 RATING_BBB = "BBB"
 RATING_C = "C"
+RATINGS_BEST_FIRST = (RATING_AAA, RATING_BBB, RATING_C)
+
+# Constants for the Average Credit Score adjustment
+AVERAGE_CREDIT_GOOD_ADJUSTMENT = -1
+AVERAGE_CREDIT_POOR_ADJUSTMENT = 1
+
+# Scoring rules configuration
+SCORING_RULES_FILE_NAME = "scoring_rules.ini"
+SCORING_RULES_FILE_KEY = "SCORING_RULES_FILE"  # Environment variable overriding the rules file path
+SCORING_RULES_RELOAD_INTERVAL = 5  # Seconds between checks of the rules file for changes
+DEFAULT_RULE_VERSION = "builtin"  # Version reported when no rules file could be loaded
+RULES_SECTION_META = "meta"
+RULES_SECTION_LTV = "loan_to_value"
+RULES_SECTION_DTI = "debt_to_income"
+RULES_SECTION_CREDIT_SCORE = "credit_score"
+RULES_SECTION_LOAN_TYPE = "loan_type"
+RULES_SECTION_PROPERTY_TYPE = "property_type"
+RULES_SECTION_AVERAGE_CREDIT = "average_credit"
+RULES_SECTION_RATING = "rating"
+RULES_VERSION_OPTION = "version"
 
 #  Credit API Blueprint Configuration
 
 CREDIT_RATING = "credit_rating"
+RULE_VERSION = "rule_version"
+LOANS_EXAMINED = "loans_examined"
+EARLY_EXIT_PARAM = "early_exit"
+
+# Admission control
+ADMISSION_PRIORITY_INTERACTIVE = "interactive"
+ADMISSION_PRIORITY_BATCH = "batch"
+ADMISSION_PRIORITIES = (ADMISSION_PRIORITY_INTERACTIVE, ADMISSION_PRIORITY_BATCH)  # Served in this order
+INTERACTIVE_MAX_LOANS = 1000  # Requests estimated at up to this many loans are interactive
+BYTES_PER_LOAN_ESTIMATE = 180  # Approximate size of one JSON-encoded mortgage
+COMPRESSION_RATIO_ESTIMATE = 10  # Assumed expansion of compressed request bodies
+UNKNOWN_BODY_SIZE_ESTIMATE = 1024 * 1024  # Assumed size of bodies sent without Content-Length
+ADMISSION_POLL_INTERVAL = 0.01  # Seconds between capacity checks of a waiting greenlet
+
+# Traffic capture and replay
+CAPTURE_QUEUE_SIZE = 1000  # Captured requests waiting to be written; further ones are dropped
+CAPTURE_LOGGER_NAME = "traffic_capture"
+CAPTURE_SCALE_MIN = 0.5  # Anonymized amounts are scaled by a random factor between these bounds
+CAPTURE_SCALE_MAX = 2.0
+CAPTURE_MAX_DRIFT_PERCENT = 1.0  # Share of anonymized requests whose replayed rating may differ from the capture
+CAPTURE_TIMESTAMP = "ts"
+CAPTURE_METHOD = "method"
+CAPTURE_PATH = "path"
+CAPTURE_QUERY = "query"
+CAPTURE_ENCODING = "encoding"
+CAPTURE_BODY = "body"
+CAPTURE_HTTP_STATUS = "http_status"
+CAPTURE_STATUS = "status"
+CAPTURE_DURATION_MS = "duration_ms"
+CAPTURE_STAGES = "stages"
+CAPTURE_ANONYMIZED = "anonymized"
+LOAN_AMOUNT = "loan_amount"
+PROPERTY_VALUE = "property_value"
+ANNUAL_INCOME = "annual_income"
+DEBT_AMOUNT = "debt_amount"
+
+# Shared-memory result cache
+RESULT_CACHE_WAYS = 8  # Slots per set; a key can only live in the slots of its set, LRU within the set
+RESULT_CACHE_LOCK_STRIPES = 64  # Cross-process locks guarding writes, each shared by a range of sets
+RESULT_CACHE_LOCK_TIMEOUT = 0.01  # Seconds a write waits for its lock before the result is not stored
+RESULT_CACHE_HITS = "hits"
+RESULT_CACHE_MISSES = "misses"
+RESULT_CACHE_STORES = "stores"
+RESULT_CACHE_EVICTIONS = "evictions"
+RESULT_CACHE_OVERSIZED = "oversized"
+RESULT_CACHE_LOCK_TIMEOUTS = "lock_timeouts"
+RESULT_CACHE_COUNTERS = (RESULT_CACHE_HITS, RESULT_CACHE_MISSES, RESULT_CACHE_STORES, RESULT_CACHE_EVICTIONS,
+                         RESULT_CACHE_OVERSIZED, RESULT_CACHE_LOCK_TIMEOUTS)
+RESULT_CACHE_ENTRIES = "entries"
+RESULT_CACHE_CAPACITY = "capacity"
+
+# Portfolio ratings
+DEALS = "deals"
+LOAN_COUNT = "loan_count"
+UNIQUE_LOANS = "unique_loans"
+LOAN_REFERENCES = "loan_references"
+
+# Streaming (NDJSON) responses
+STREAM_PARAM = "stream"
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 1000  # Loans per streamed breakdown record
+DEAL_ID = "deal_id"
+DEAL_COUNT = "deal_count"
+FIRST_INDEX = "first_index"
+RISK_SCORES = "risk_scores"
+
+# Upgrade optimizer
+TARGET_RATING_PARAM = "target"
+OBJECTIVE_PARAM = "objective"
+OBJECTIVE_COUNT = "count"  # Remove as few loans as possible
+OBJECTIVE_PRINCIPAL = "principal"  # Remove as little principal as possible
+OBJECTIVES = (OBJECTIVE_COUNT, OBJECTIVE_PRINCIPAL)
+TARGET_RATING = "target_rating"
+ACHIEVABLE = "achievable"
+OPTIMIZED_RATING = "optimized_rating"
+REMOVED_LOANS = "removed_loans"
+REMOVED_COUNT = "removed_count"
+REMOVED_PRINCIPAL = "removed_principal"
+REMAINING_LOANS = "remaining_loans"
+
+# Bulk validation (?validation=bulk)
+VALIDATION_MODE_PARAM = "validation"
+VALIDATION_MODE_BULK = "bulk"
+MAX_ERRORS_PARAM = "max_errors"
+SCORE_VALID_PARAM = "score_valid"
+DEFAULT_MAX_VALIDATION_ERRORS = 100  # Field errors reported per request unless ?max_errors= is given
+MAX_VALIDATION_ERRORS_LIMIT = 1000
+VALIDATION_REPORT = "validation"
+VALID_COUNT = "valid_count"
+INVALID_COUNT = "invalid_count"
+VALIDATION_ERRORS = "errors"
+ERRORS_TRUNCATED = "errors_truncated"
+ERROR_INDEX = "index"
+ERROR_FIELD = "field"
+ERROR_MESSAGE = "message"
 API_BLUEPRINT_NAME = "api"
 
 # Endpoint Routes
 CREDIT_RATING_ENDPOINT = "/calculate_credit_rating"
+PORTFOLIO_RATING_ENDPOINT = "/calculate_portfolio_rating"
+UPGRADE_PLAN_ENDPOINT = "/upgrade_plan"
+JOBS_ENDPOINT = "/jobs"
+JOB_ENDPOINT = "/jobs/<job_id>"
+RATING_HISTORY_ENDPOINT = "/rating_history/<deal_id>"
+RATING_MIGRATIONS_ENDPOINT = "/rating_migrations"
+
+# Health and readiness probes
+HEALTH_BLUEPRINT_NAME = "health"
+LIVENESS_ENDPOINT = "/healthz"
+READINESS_ENDPOINT = "/readyz"
+PROBE_ENDPOINTS = (LIVENESS_ENDPOINT, READINESS_ENDPOINT)
+LOOP_LAG_INTERVAL = 0.5  # Seconds between event-loop lag measurements
+READINESS_MAX_LOOP_LAG_MS = 1000  # Report not ready while the event loop lags more than this
+GREENLET_POOL_EXTENSION = "greenlet_pool"  # Flask app extension holding the server's greenlet pool
+READY = "ready"
+IN_FLIGHT_LOANS = "in_flight_loans"
+IN_FLIGHT_BYTES = "in_flight_bytes"
+WAITING_REQUESTS = "waiting_requests"
+SHED_REQUESTS = "shed_requests"
+JOB_QUEUE_DEPTH = "job_queue_depth"
+LOOP_LAG_MS = "loop_lag_ms"
+JOB_WORKER_UTILIZATION = "job_worker_utilization"
+CONNECTION_UTILIZATION = "connection_utilization"
+COALESCED_RATIO = "coalesced_ratio"
+RESULT_CACHE_HIT_RATIO = "result_cache_hit_ratio"
+
+# Request coalescing
+SINGLE_FLIGHT_POLL_INTERVAL = 0.005  # Seconds between checks while a greenlet waits for a coalesced leader
+
+# Asynchronous rating jobs
+JOBS_BLUEPRINT_NAME = "jobs"
+GET = "GET"
+DELETE = "DELETE"
+PER_MINUTE_120 = "120 per minute"  # Allow up to 120 job status polls per minute per IP
+JOB_WORKERS = 2  # Worker threads scoring queued jobs
+JOB_QUEUE_SIZE = 100  # Maximum number of queued (not yet running) jobs
+JOB_RESULT_TTL = 3600  # Seconds a finished job and its result are kept
+JOB_MAX_WAIT = 30  # Maximum seconds a status request may long-poll
+JOB_POLL_INTERVAL = 0.05  # Seconds between checks while a greenlet long-polls a job
+PROGRESS_REPORT_INTERVAL = 1000  # Loans scored between progress reports
+JOB_TAPE_DIR_KEY = "JOB_TAPE_DIR"  # Environment variable pointing at the uploaded tape directory
+DEFAULT_JOB_TAPE_DIR = "tapes"
+JOB_PRIORITY_HIGH = "high"
+JOB_PRIORITY_NORMAL = "normal"
+JOB_PRIORITY_LOW = "low"
+JOB_PRIORITIES = {JOB_PRIORITY_HIGH: 0, JOB_PRIORITY_NORMAL: 1, JOB_PRIORITY_LOW: 2}
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_CANCELLED = "cancelled"
+JOB_FINAL_STATUSES = {JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED, JOB_STATUS_CANCELLED}
+JOB_ID = "job_id"
+JOB_STATUS = "status"
+JOB_PRIORITY = "priority"
+JOB_LOANS_TOTAL = "loans_total"
+JOB_LOANS_SCORED = "loans_scored"
+JOB_RESULT = "result"
+JOB_ERROR = "error"
+JOB_CREATED_AT = "created_at"
+JOB_FINISHED_AT = "finished_at"
+JOB_TAPE = "tape"
+JOB_WAIT_PARAM = "wait"
+JOB_PRIORITY_PARAM = "priority"
+MORTGAGES = "mortgages"
+
+# Compressed request bodies
+CONTENT_ENCODING_HEADER = "Content-Encoding"
+ENCODING_IDENTITY = "identity"
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+ENCODING_ZSTD = "zstd"
+MAX_DECOMPRESSED_BODY_SIZE = 512 * 1024 * 1024  # Decompression bomb guard, in bytes of decompressed JSON
+BODY_READ_CHUNK_SIZE = 64 * 1024  # Bytes read from the socket, and produced by the decompressor, per step
+
+# Arrow IPC request bodies
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+ARROW_CACHE_MODE = "arrow"  # Distinguishes Arrow bodies from JSON bodies in the result cache key
+
+# Request stage timings
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Tracing
+REQUEST_ID_HEADER = "X-Request-ID"  # Propagated from the request, or generated, and echoed in the response
+MAX_REQUEST_ID_LENGTH = 128  # Longer incoming request IDs are replaced by a generated one
+TRACE_QUEUE_SIZE = 1000  # Finished traces waiting to be exported; further ones are dropped
+TRACE_SCORE_CHUNK_SIZE = 1000  # Loans per scoring chunk span
+SPAN_SCORE_CHUNK = "score.chunk"
+TRACE_ID = "trace_id"
+SPAN_ID = "span_id"
+PARENT_ID = "parent_id"
+SPAN_NAME = "name"
+SPAN_START = "start"
+SPAN_DURATION_MS = "duration_ms"
+SPAN_ATTRIBUTES = "attributes"
+SPAN_ERROR = "error"
+TRACE_SPANS = "spans"
+HTTP_STATUS_ATTRIBUTE = "http.status_code"
+STAGE_PARSE = "parse"
+STAGE_VALIDATE = "validate"
+STAGE_SCORE = "score"
+STAGE_SERIALIZE = "serialize"
+STAGE_TOTAL = "total"
+
+# Rating history
+HISTORY_BLUEPRINT_NAME = "history"
+RATING_HISTORY_QUEUE_SIZE = 10000  # Ratings waiting to be written; further ones are dropped
+RATING_HISTORY_BUSY_TIMEOUT = 5  # Seconds a worker process waits for another one's write transaction
+POOL_HASH_BUFFER_BYTES = 65_536  # Encoded credit scores buffered before the canonical pool hash is updated
+AS_OF_PARAM = "as_of"
+SINCE_PARAM = "since"
+UNTIL_PARAM = "until"
+COMPONENTS = "components"
+TOTAL_RISK_SCORE = "total_risk_score"
+CREDIT_ADJUSTMENT = "credit_adjustment"
+POOL_HASH = "pool_hash"
+RATED_AT = "rated_at"
+RATING_FROM = "rating_from"
+RATING_TO = "rating_to"
+MIGRATIONS = "migrations"
+
+# Memory accounting
+# Measured peaks with tracemalloc: the default path holds the body (~185 bytes per loan), the decoded JSON
+# (~700) and the validated models (~900) at once; the incremental path keeps a list slot per loan
+MEMORY_BYTES_PER_LOAN = 1800
+MEMORY_BYTES_PER_LOAN_INCREMENTAL = 16
+MEMORY_INCREMENTAL_BASE_BYTES = 1024 * 1024  # Parser buffers and one chunk of the body
+MEMORY_ARROW_BODY_FACTOR = 3  # Arrow columns are read in place; scoring adds a few arrays of the same length
+MEMORY_PEAK_BYTES = "memory_peak_bytes"
+
+# Tape pipeline (python -m tools.tape_pipeline)
+WATCH_READ_SIZE = 64 * 1024  # Bytes of inotify events read per call
+TAPE_POLL_INTERVAL = 2.0  # Seconds between directory polls where inotify is unavailable
+TAPE_PENDING_PER_WORKER = 2  # Tapes queued per worker process before the watcher waits for one to finish
+TAPE_HASH_CHUNK_SIZE = 1024 * 1024  # Bytes hashed per read
+TAPE_JSON_SUFFIX = ".json"
+TAPE_ARROW_SUFFIX = ".arrow"
+TAPE_PARTIAL_SUFFIXES = (".tmp", ".part")  # Files still being uploaded under a temporary name
+TAPE_MANIFEST = "manifest.jsonl"  # Tapes already processed, one JSON line each, in the output directory
+TAPE_RESULT_SUFFIX = ".result.json"
+TAPE_ERROR_SUFFIX = ".error.json"
+CONTENT_HASH = "content_hash"
+TAPE_OUTPUT = "output"
+
+# Approximate ratings (?approximate=true)
+APPROXIMATE_PARAM = "approximate"
+CONFIDENCE_PARAM = "confidence"
+DEFAULT_APPROXIMATE_CONFIDENCE = 0.95  # Probability the reported rating must reach unless ?confidence= is given
+APPROXIMATE_INITIAL_SAMPLE = 500  # Loans sampled in the first round
+APPROXIMATE_SAMPLE_GROWTH = 2  # Factor the sample grows by each round until the confidence is reached
+APPROXIMATE_GRID_STEP = 0.01  # Standard deviations between the points the average credit score is integrated at
+APPROXIMATE_GRID_LIMIT = 6  # Standard deviations the integration extends to on either side
+APPROXIMATION = "approximation"
+RATING_PROBABILITIES = "rating_probabilities"
+LOANS_SAMPLED = "loans_sampled"
+AVERAGE_CREDIT_SCORE = "average_credit_score"
+ESTIMATE = "estimate"
+LOWER_BOUND = "lower"
+UPPER_BOUND = "upper"
+
+# Tenants and API keys
+API_KEY_HEADER = "X-API-Key"
+API_KEYS_RELOAD_INTERVAL = 5.0  # Seconds between checks of the API keys file for changes
+API_KEY_CACHE_SIZE = 1024  # Verified and rejected API keys remembered per worker process, each
+API_KEY_MAX_FAILURES = 5  # Failed verifications of a key ID per API_KEY_FAILURE_WINDOW before the rest are refused
+API_KEY_FAILURE_WINDOW = 10.0  # Seconds over which failed verifications of a key ID are counted
+API_KEY_ID_BYTES = 4  # Random bytes of the public key ID that prefixes every API key
+API_KEY_SECRET_BYTES = 32
+API_KEY_SALT_BYTES = 16
+API_KEY_HASH_BYTES = 32
+API_KEY_SCRYPT_N = 2 ** 14  # scrypt cost parameters: about 16 MB and tens of milliseconds per verification
+API_KEY_SCRYPT_R = 8
+API_KEY_SCRYPT_P = 1
+TENANT_WEIGHT_OPTION = "weight"
+TENANT_DAILY_LOANS_OPTION = "daily_loans"
+TENANT_KEYS_OPTION = "keys"
+DEFAULT_TENANT_WEIGHT = 1.0
+ANONYMOUS_TENANT = ""  # The tenant of every request while no API keys file is configured
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Scoring engines
+SCORING_ENGINE_HEADER = "X-Scoring-Engine"
+ENGINE_AUTO = "auto"
+ENGINE_LOOP = "loop"  # The risk calculators, one after the other for every loan
+ENGINE_FUSED = "fused"  # All five components in a single pass with the rules unpacked once
+ENGINE_COLUMNS = "columns"  # Vectorized Arrow kernels over the pool converted to columns; needs pyarrow
+ENGINE_PROCESSES = "processes"  # Fused scoring of chunks of the pool in a pool of worker processes
+DEFAULT_ENGINE_CROSSOVERS = ((0, ENGINE_FUSED),)  # (smallest pool, engine) until calibrated
+ENGINE_CALIBRATION_SIZES = (10, 100, 1_000, 10_000, 100_000)
+ENGINE_CALIBRATION_REPEATS = 3  # The fastest of these runs is kept
+ENGINE_CALIBRATION_MAX_SECONDS = 2.0  # An engine projected to take longer at the next size is not measured there
+ENGINE_CALIBRATION_SEED = 0
+ENGINE_PROCESS_CHUNK_SIZE = 25_000  # Loans per task of the process engine
+ENGINE_PROCESS_POLL_INTERVAL = 0.005  # Seconds between checks while a greenlet waits for a scoring task
+CROSSOVERS = "crossovers"
+TIMINGS = "timings"
+CPU_COUNT = "cpu_count"
 
 # Response Messages
 SUCCESS_MSG = "Credit rating calculation successful"
+JOB_ACCEPTED_MSG = "Credit rating job accepted"
+JOB_STATUS_MSG = "Credit rating job status"
+JOB_CANCEL_REQUESTED_MSG = "Credit rating job cancellation requested"
+JOB_NOT_FOUND_MSG = "Credit rating job not found or expired."
+JOB_QUEUE_FULL_MSG = "The job queue is full. Please retry later."
 ERROR_MSG = "An unexpected error occurred."
 
 # HTTP Status Codes
@@ -136,9 +514,49 @@ ERROR_MSG_TOTAL_RISK = "Error calculating total risk score"
 ERROR_MSG_CREDIT_RATING = "Error calculating credit rating"
 INPUT_ERROR_MSG = "There was an error with the input data."
 ERROR_LOGGING_EXCEPTION = "Error logging exception"
+ERROR_MSG_RULES_LOAD = "Error loading scoring rules"
+ERROR_MSG_RULES_INVALID = "Invalid scoring rules"
+ERROR_MSG_JOB_FAILED = "Credit rating job failed"
+ERROR_MSG_INVALID_TAPE = "Invalid tape reference"
+ERROR_MSG_INVALID_PRIORITY = "Invalid job priority"
+ERROR_MSG_INVALID_JOB_REQUEST = "Job request must contain either mortgages or a tape reference"
+ERROR_MSG_PAYLOAD_TOO_LARGE = "Decompressed request body exceeds"
+ERROR_MSG_CORRUPT_BODY = "Error decompressing request body"
+ERROR_MSG_INVALID_MAX_ERRORS = "max_errors must be a positive integer"
+ERROR_MSG_DUPLICATE_LOAN_ID = "Loan IDs must be unique within a portfolio"
+ERROR_MSG_DUPLICATE_DEAL_ID = "Deal IDs must be unique within a portfolio"
+ERROR_MSG_UNKNOWN_LOAN_ID = "Deal references an unknown loan"
+ERROR_MSG_PORTFOLIO_RATING = "Error calculating portfolio ratings"
+ERROR_MSG_INVALID_TARGET_RATING = "target must be one of"
+ERROR_MSG_INVALID_OBJECTIVE = "objective must be one of"
+ERROR_MSG_UPGRADE_PLAN = "Error calculating upgrade plan"
+ERROR_MSG_STREAM_MODE = "stream=true cannot be combined with early_exit or validation=bulk"
+ERROR_MSG_STREAMING = "Error while streaming the response"
+ERROR_MSG_ARROW_MODE = "Arrow request bodies cannot be combined with early_exit, validation=bulk or stream"
+ERROR_MSG_INVALID_ARROW = "The request body is not a valid Arrow IPC stream"
+ERROR_MSG_ARROW_COLUMN = "Invalid mortgage column"
+ERROR_MSG_INVALID_TIMESTAMP = "Timestamps must be ISO 8601 or seconds since the epoch"
+ERROR_MSG_HISTORY_DISABLED = "Rating history is not enabled"
+ERROR_MSG_RATING_HISTORY = "Error querying rating history"
+ERROR_MSG_MEMORY_BUDGET = "Request exceeds the memory budget"
+ERROR_MSG_WATCH_SCAN = "Error scanning watched directory"
+ERROR_MSG_INVALID_TAPE_CONTENT = "A tape must be a JSON object with a non-empty mortgages list"
+ERROR_MSG_TAPE_INVALID_LOANS = "The tape contains invalid mortgages"
+ERROR_MSG_TAPE_READ = "Error reading tape"
+ERROR_MSG_APPROXIMATE_MODE = "approximate=true cannot be combined with early_exit, validation=bulk, stream or " \
+                             "Arrow request bodies"
+ERROR_MSG_INVALID_CONFIDENCE = "confidence must be a number between 0 and 1, exclusive"
+ERROR_MSG_APPROXIMATE_RATING = "Error estimating credit rating"
+ERROR_MSG_API_KEYS_LOAD = "Error loading API keys"
+ERROR_MSG_INVALID_TENANT = "Invalid tenant"
+ERROR_MSG_UNKNOWN_ENGINE = "Unknown or unavailable scoring engine"
+ERROR_MSG_ENGINE_CALIBRATION = "Error loading scoring engine calibration"
 
 # Success Messages
 SUCCESS_MSG_CREDIT_RATING = "Credit rating calculated successfully"
+SUCCESS_MSG_PORTFOLIO_RATING = "Portfolio ratings calculated successfully"
+SUCCESS_MSG_UPGRADE_PLAN = "Upgrade plan calculated successfully"
+SUCCESS_MSG_RATING_HISTORY = "Rating history retrieved successfully"
 
 # Validation and Input Error Messages
 MISSING_KEY_ERROR_MSG = "Missing key in payload"
@@ -146,6 +564,12 @@ INCORRECT_TYPE_ERROR_MSG = "Incorrect type in payload"
 VALIDATION_ERROR_MSG = "The provided data is invalid."
 VALIDATION_FAILED_MSG = "Validation failed."
 INVALID_JSON_FORMAT_MSG = "Invalid JSON format."
+PAYLOAD_TOO_LARGE_MSG = "The request body is too large."
+UNSUPPORTED_ENCODING_MSG = "Unsupported Content-Encoding."
+CORRUPT_BODY_MSG = "The compressed request body could not be decoded."
+ARROW_UNAVAILABLE_MSG = "Arrow request bodies are not supported by this server."
+MEMORY_BUDGET_EXCEEDED_MSG = "The request would exceed the memory budget; send a smaller pool or use a job."
+RATING_NOT_FOUND_MSG = "No rating recorded for the deal at that time."
 
 # Constants related to API response messages
 DEFAULT_SUCCESS_MESSAGE = "Request processed successfully."
@@ -160,7 +584,14 @@ MSG = "msg"
 DATA = "data"
 DESCRIPTION = "description"
 TOO_MANY_REQUESTS_MSG = "Too many requests. Please retry after the specified time."
+INVALID_API_KEY_MSG = "A valid API key is required in the X-API-Key header."
+LOAN_QUOTA_EXCEEDED_MSG = "The daily loan quota of this API key is used up. Please retry after the specified time."
+LIVE_MSG = "Service is alive"
+READY_MSG = "Service is ready"
+NOT_READY_MSG = "Service is saturated"
+SERVICE_OVERLOADED_MSG = "The service is at capacity. Please retry after the specified time."
 RETRY_AFTER_HEADER = "Retry-After"
+WWW_AUTHENTICATE_HEADER = "WWW-Authenticate"
 
 # Error Messages
 ERROR_SERVER_START = "Error while starting the server"
@@ -168,6 +599,32 @@ ERROR_APP_CREATION = "Error during app creation"
 
 # Log Messages
 LOG_LISTENING_AT = "Listening at"
+LOG_RULES_LOADED = "Scoring rules loaded, version"
+LOG_REQUEST_COALESCED = "Coalesced with in-flight request"
+LOG_BULK_VALIDATION = "Bulk validation rejected mortgages"
+LOG_REQUEST_SHED = "Request shed by admission control"
+LOG_CAPTURE_STARTED = "Capturing rating traffic to"
+LOG_CAPTURE_DROPPED = "Traffic capture queue full, dropped request"
+ERROR_MSG_CAPTURE_WRITE = "Error writing captured request"
+LOG_WORKER_STARTED = "Started worker process"
+LOG_WORKER_EXITED = "Worker process exited, restarting"
+LOG_WORKERS_STOPPING = "Stopping worker processes"
+LOG_TRACING_STARTED = "Exporting traces to"
+LOG_TRACE_DROPPED = "Trace export queue full, dropped trace"
+ERROR_MSG_TRACE_EXPORT = "Error exporting traces"
+LOG_RATING_HISTORY_STARTED = "Recording rating history to"
+LOG_RATING_HISTORY_DROPPED = "Rating history queue full, dropped rating"
+ERROR_MSG_RATING_HISTORY_WRITE = "Error writing rating history"
+LOG_INOTIFY_UNAVAILABLE = "inotify unavailable, polling instead for"
+LOG_TAPE_PIPELINE_STARTED = "Watching for loan tapes in"
+LOG_TAPE_RATED = "Rated tape"
+LOG_TAPE_FAILED = "Could not rate tape"
+LOG_TAPE_SKIPPED = "Skipped tape already rated under the same rule version"
+LOG_TAPE_RULES_CHANGED = "Scoring rules changed, re-checking tapes for version"
+LOG_API_KEYS_LOADED = "API keys loaded for tenants"
+LOG_INVALID_API_KEY = "Rejected request with a missing or invalid API key"
+LOG_LOAN_QUOTA_EXCEEDED = "Daily loan quota used up for tenant"
+LOG_ENGINES_CALIBRATED = "Scoring engine crossovers"
 
 # unittest
 LOW_RISK_PAYLOAD = {
@@ -0,0 +1,224 @@
+import configparser
+import os
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+
+from configs.constants import (
+    SCORING_RULES_FILE_NAME, SCORING_RULES_FILE_KEY, SCORING_RULES_RELOAD_INTERVAL, DEFAULT_RULE_VERSION,
+    RULES_SECTION_META, RULES_SECTION_LTV, RULES_SECTION_DTI, RULES_SECTION_CREDIT_SCORE, RULES_SECTION_LOAN_TYPE,
+    RULES_SECTION_PROPERTY_TYPE, RULES_SECTION_AVERAGE_CREDIT, RULES_SECTION_RATING, RULES_VERSION_OPTION,
+    LTV_HIGH_THRESHOLD, LTV_MEDIUM_THRESHOLD, LTV_HIGH_SCORE, LTV_MEDIUM_SCORE, LTV_LOW_SCORE,
+    DTI_HIGH_THRESHOLD, DTI_MEDIUM_THRESHOLD, DTI_HIGH_SCORE, DTI_MEDIUM_SCORE, DTI_LOW_SCORE,
+    CREDIT_SCORE_GOOD, CREDIT_SCORE_POOR, CREDIT_SCORE_GOOD_DEDUCTION, CREDIT_SCORE_POOR_ADDITION, CREDIT_SCORE_NEUTRAL,
+    LOAN_TYPE_FIXED_SCORE, LOAN_TYPE_ADJUSTABLE_SCORE, PROPERTY_TYPE_SINGLE_FAMILY_SCORE, PROPERTY_TYPE_CONDO_SCORE,
+    AVERAGE_CREDIT_GOOD_ADJUSTMENT, AVERAGE_CREDIT_POOR_ADJUSTMENT, RATING_SCORE_AAA, RATING_SCORE_BBB,
+    ERROR_MSG_RULES_LOAD, ERROR_MSG_RULES_INVALID, LOG_RULES_LOADED,
+)
+from utils.logger import project_logger
+
+# Scoring rules file, overridable through the environment
+SCORING_RULES_PATH = os.getenv(SCORING_RULES_FILE_KEY,
+                               os.path.join(os.path.dirname(__file__), SCORING_RULES_FILE_NAME))
+
+
+class ScoringRules(NamedTuple):
+    """
+    Compiled, immutable set of scoring weights and thresholds for one rule version.
+
+    Defaults mirror the constants in `configs/constants.py`, so a missing option in the rules file
+    keeps the built-in behaviour.
+    """
+    version: str = DEFAULT_RULE_VERSION
+    ltv_high_threshold: float = LTV_HIGH_THRESHOLD
+    ltv_medium_threshold: float = LTV_MEDIUM_THRESHOLD
+    ltv_high_score: int = LTV_HIGH_SCORE
+    ltv_medium_score: int = LTV_MEDIUM_SCORE
+    ltv_low_score: int = LTV_LOW_SCORE
+    dti_high_threshold: float = DTI_HIGH_THRESHOLD
+    dti_medium_threshold: float = DTI_MEDIUM_THRESHOLD
+    dti_high_score: int = DTI_HIGH_SCORE
+    dti_medium_score: int = DTI_MEDIUM_SCORE
+    dti_low_score: int = DTI_LOW_SCORE
+    credit_score_good: int = CREDIT_SCORE_GOOD
+    credit_score_poor: int = CREDIT_SCORE_POOR
+    credit_score_good_score: int = CREDIT_SCORE_GOOD_DEDUCTION
+    credit_score_poor_score: int = CREDIT_SCORE_POOR_ADDITION
+    credit_score_neutral_score: int = CREDIT_SCORE_NEUTRAL
+    loan_type_fixed_score: int = LOAN_TYPE_FIXED_SCORE
+    loan_type_adjustable_score: int = LOAN_TYPE_ADJUSTABLE_SCORE
+    property_type_single_family_score: int = PROPERTY_TYPE_SINGLE_FAMILY_SCORE
+    property_type_condo_score: int = PROPERTY_TYPE_CONDO_SCORE
+    average_credit_good_adjustment: int = AVERAGE_CREDIT_GOOD_ADJUSTMENT
+    average_credit_poor_adjustment: int = AVERAGE_CREDIT_POOR_ADJUSTMENT
+    rating_score_aaa: int = RATING_SCORE_AAA
+    rating_score_bbb: int = RATING_SCORE_BBB
+
+    def loan_score_bounds(self) -> Tuple[int, int]:
+        """
+        Smallest and largest risk score a single mortgage can receive under these rules.
+
+        Returns:
+            Tuple[int, int]: The (minimum, maximum) per-loan risk score.
+        """
+        # Loan and property type calculators fall back to 0 for unexpected values
+        components = [
+            (self.ltv_high_score, self.ltv_medium_score, self.ltv_low_score),
+            (self.dti_high_score, self.dti_medium_score, self.dti_low_score),
+            (self.credit_score_good_score, self.credit_score_poor_score, self.credit_score_neutral_score),
+            (self.loan_type_fixed_score, self.loan_type_adjustable_score, 0),
+            (self.property_type_single_family_score, self.property_type_condo_score, 0),
+        ]
+        return sum(min(scores) for scores in components), sum(max(scores) for scores in components)
+
+    def cache_key(self, pool_hash: str) -> str:
+        """
+        Build a cache key for a pool so that results never outlive the rules they were computed with.
+
+        Args:
+            pool_hash (str): Canonical hash of the pool.
+
+        Returns:
+            str: The pool hash prefixed with the rule version.
+        """
+        return f"{self.version}:{pool_hash}"
+
+
+# Mapping of ScoringRules fields to their (section, option, type) in the rules file
+_RULE_OPTIONS = {
+    "ltv_high_threshold": (RULES_SECTION_LTV, "high_threshold", float),
+    "ltv_medium_threshold": (RULES_SECTION_LTV, "medium_threshold", float),
+    "ltv_high_score": (RULES_SECTION_LTV, "high_score", int),
+    "ltv_medium_score": (RULES_SECTION_LTV, "medium_score", int),
+    "ltv_low_score": (RULES_SECTION_LTV, "low_score", int),
+    "dti_high_threshold": (RULES_SECTION_DTI, "high_threshold", float),
+    "dti_medium_threshold": (RULES_SECTION_DTI, "medium_threshold", float),
+    "dti_high_score": (RULES_SECTION_DTI, "high_score", int),
+    "dti_medium_score": (RULES_SECTION_DTI, "medium_score", int),
+    "dti_low_score": (RULES_SECTION_DTI, "low_score", int),
+    "credit_score_good": (RULES_SECTION_CREDIT_SCORE, "good_threshold", int),
+    "credit_score_poor": (RULES_SECTION_CREDIT_SCORE, "poor_threshold", int),
+    "credit_score_good_score": (RULES_SECTION_CREDIT_SCORE, "good_score", int),
+    "credit_score_poor_score": (RULES_SECTION_CREDIT_SCORE, "poor_score", int),
+    "credit_score_neutral_score": (RULES_SECTION_CREDIT_SCORE, "neutral_score", int),
+    "loan_type_fixed_score": (RULES_SECTION_LOAN_TYPE, "fixed_score", int),
+    "loan_type_adjustable_score": (RULES_SECTION_LOAN_TYPE, "adjustable_score", int),
+    "property_type_single_family_score": (RULES_SECTION_PROPERTY_TYPE, "single_family_score", int),
+    "property_type_condo_score": (RULES_SECTION_PROPERTY_TYPE, "condo_score", int),
+    "average_credit_good_adjustment": (RULES_SECTION_AVERAGE_CREDIT, "good_adjustment", int),
+    "average_credit_poor_adjustment": (RULES_SECTION_AVERAGE_CREDIT, "poor_adjustment", int),
+    "rating_score_aaa": (RULES_SECTION_RATING, "aaa_max_score", int),
+    "rating_score_bbb": (RULES_SECTION_RATING, "bbb_max_score", int),
+}
+
+
+def load_scoring_rules(path: str) -> ScoringRules:
+    """
+    Read and compile the scoring rules file.
+
+    Args:
+        path (str): Path to the rules .ini file.
+
+    Returns:
+        ScoringRules: The compiled rules.
+
+    Raises:
+        ValueError: If the file cannot be read or the rules are inconsistent.
+    """
+    parser = configparser.ConfigParser()
+    if not parser.read(path):
+        raise ValueError(f"{ERROR_MSG_RULES_LOAD}: {path} not found")
+
+    version = parser.get(RULES_SECTION_META, RULES_VERSION_OPTION, fallback=None)
+    if not version:
+        raise ValueError(f"{ERROR_MSG_RULES_INVALID}: missing [{RULES_SECTION_META}] {RULES_VERSION_OPTION}")
+
+    values = {}
+    for field, (section, option, cast) in _RULE_OPTIONS.items():
+        raw = parser.get(section, option, fallback=None)
+        values[field] = ScoringRules._field_defaults[field] if raw is None else cast(raw)
+
+    rules = ScoringRules(version=version.strip(), **values)
+    if rules.ltv_medium_threshold > rules.ltv_high_threshold \
+            or rules.dti_medium_threshold > rules.dti_high_threshold \
+            or rules.credit_score_poor > rules.credit_score_good \
+            or rules.rating_score_aaa > rules.rating_score_bbb:
+        raise ValueError(f"{ERROR_MSG_RULES_INVALID}: thresholds are not ordered")
+    return rules
+
+
+class ScoringRulesStore:
+    """
+    Holds the active scoring rules and swaps in a new version when the rules file changes.
+
+    Readers get the current `ScoringRules` object by reference; a reload builds a complete new object and
+    replaces the reference in one assignment, so in-flight requests keep scoring with the version they started
+    with. The file is only checked every `reload_interval` seconds and is never re-parsed unless it changed.
+    """
+
+    def __init__(self, path: str, reload_interval: float = SCORING_RULES_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._rules = ScoringRules()
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+        self.reload()
+
+    def current(self) -> ScoringRules:
+        """
+        Return the active rules, reloading them first if the rules file changed since the last check.
+        """
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._check_for_changes(now)
+        return self._rules
+
+    def _check_for_changes(self, now: float) -> None:
+        # Only one caller checks the file; everyone else keeps serving the current rules
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + self.reload_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return
+            if mtime != self._mtime:
+                self._load(mtime)
+        finally:
+            self._lock.release()
+
+    def reload(self) -> ScoringRules:
+        """
+        Force a reload of the rules file.
+
+        Returns:
+            ScoringRules: The active rules after the reload attempt.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            self._load(mtime)
+        return self._rules
+
+    def _load(self, mtime: Optional[int]) -> None:
+        # Remember the mtime even on failure so a broken file is not re-parsed until it changes again
+        self._mtime = mtime
+        try:
+            rules = load_scoring_rules(self.path)
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_RULES_LOAD}: {e}. Keeping version {self._rules.version}")
+            return
+        self._rules = rules
+        project_logger.info(f"{LOG_RULES_LOADED} {rules.version}")
+
+
+scoring_rules_store = ScoringRulesStore(SCORING_RULES_PATH)
+
+
+def get_scoring_rules() -> ScoringRules:
+    """Return the currently active scoring rules."""
+    return scoring_rules_store.current()
@@ -0,0 +1,92 @@
+from http import HTTPStatus
+from typing import Any, Dict
+
+from flask import current_app
+
+from configs.constants import (
+    LIVE_MSG, READY_MSG, NOT_READY_MSG, READY, RULE_VERSION, IN_FLIGHT_LOANS, IN_FLIGHT_BYTES, WAITING_REQUESTS,
+    SHED_REQUESTS, JOB_QUEUE_DEPTH, LOOP_LAG_MS, JOB_WORKER_UTILIZATION, CONNECTION_UTILIZATION, COALESCED_RATIO,
+    RESULT_CACHE_HIT_RATIO, MEMORY_PEAK_BYTES, GREENLET_POOL_EXTENSION, READINESS_MAX_LOOP_LAG_MS,
+)
+from configs.rules import get_scoring_rules
+from controllers.rating_controller import rating_single_flight
+from utils.admission import admission_controller
+from utils.jobs import job_manager
+from utils.loop_monitor import loop_lag_monitor
+from utils.memory import memory_accounting
+from utils.shared_cache import result_cache
+from utils.response import create_api_response
+
+
+def collect_saturation_signals() -> Dict[str, Any]:
+    """
+    Gather the saturation signals of this process from the admission controller, job manager, event loop,
+    server greenlet pool, request coalescing, the shared result cache and memory sampling.
+
+    Returns:
+        Dict[str, Any]: The signals; values that are not measured in this serving mode are None.
+    """
+    admission = admission_controller.stats()
+    coalescing = rating_single_flight.stats()
+    requests = coalescing["leaders"] + coalescing["coalesced"]
+    pool = current_app.extensions.get(GREENLET_POOL_EXTENSION)
+
+    return {
+        IN_FLIGHT_LOANS: admission["in_flight_loans"],
+        IN_FLIGHT_BYTES: admission["in_flight_bytes"],
+        WAITING_REQUESTS: admission["waiting"],
+        SHED_REQUESTS: admission["shed"],
+        JOB_QUEUE_DEPTH: job_manager.queue_depth(),
+        JOB_WORKER_UTILIZATION: job_manager.busy_workers / job_manager.workers,
+        CONNECTION_UTILIZATION: None if pool is None else (pool.size - pool.free_count()) / pool.size,
+        LOOP_LAG_MS: loop_lag_monitor.read_max() if loop_lag_monitor.running else None,
+        COALESCED_RATIO: coalescing["coalesced"] / requests if requests else None,
+        RESULT_CACHE_HIT_RATIO: result_cache.hit_ratio(),
+        MEMORY_PEAK_BYTES: memory_accounting.stats(),
+    }
+
+
+def is_saturated(signals: Dict[str, Any]) -> bool:
+    """
+    Decide whether this process should be taken out of rotation for new traffic.
+
+    Args:
+        signals (Dict[str, Any]): The output of `collect_saturation_signals`.
+
+    Returns:
+        bool: True if the admission queues, the job queue or the event loop are overloaded.
+    """
+    admission_full = signals[IN_FLIGHT_LOANS] >= admission_controller.max_loans \
+        or any(waiting >= admission_controller.max_waiting for waiting in signals[WAITING_REQUESTS].values())
+    job_queue_full = signals[JOB_QUEUE_DEPTH] >= job_manager.max_queued
+    loop_lagging = (signals[LOOP_LAG_MS] or 0) > READINESS_MAX_LOOP_LAG_MS
+    return admission_full or job_queue_full or loop_lagging
+
+
+def get_liveness() -> Any:
+    """
+    Report that the process is up and serving requests.
+
+    Returns:
+        Any: JSON response object.
+    """
+    return create_api_response(msg=LIVE_MSG, status_code=HTTPStatus.OK)
+
+
+def get_readiness() -> Any:
+    """
+    Report whether the process can take more work, along with its saturation signals.
+
+    A saturated process answers with HTTP 503 so that load balancers stop routing to it, while autoscalers can
+    read the signals from either response.
+
+    Returns:
+        Any: JSON response object, or a (response, status) tuple when not ready.
+    """
+    signals = collect_saturation_signals()
+    ready = not is_saturated(signals)
+    data = {READY: ready, RULE_VERSION: get_scoring_rules().version, **signals}
+    if ready:
+        return create_api_response(msg=READY_MSG, status_code=HTTPStatus.OK, data=data)
+    return create_api_response(msg=NOT_READY_MSG, status_code=HTTPStatus.SERVICE_UNAVAILABLE, data=data), \
+        HTTPStatus.SERVICE_UNAVAILABLE
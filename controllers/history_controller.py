@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Any, Optional
+
+from flask import request
+
+from configs.constants import (
+    AS_OF_PARAM, SINCE_PARAM, UNTIL_PARAM, RATED_AT, MIGRATIONS, ERROR_MSG_INVALID_TIMESTAMP,
+    ERROR_MSG_HISTORY_DISABLED, SUCCESS_MSG_RATING_HISTORY, RATING_NOT_FOUND_MSG,
+)
+from utils.rating_history import rating_history
+from utils.response import create_api_response
+
+
+def parse_timestamp(raw: Optional[str], default: Optional[float] = None) -> float:
+    """
+    Parse a query string timestamp, given as ISO 8601 (UTC unless it has an offset) or seconds since the epoch.
+
+    Args:
+        raw (Optional[str]): The query string value.
+        default (float, optional): Returned when the value is missing; without one, the value is required.
+
+    Returns:
+        float: Seconds since the epoch.
+
+    Raises:
+        ValueError: If the value is missing and required, or cannot be parsed.
+    """
+    if raw is None or not raw.strip():
+        if default is None:
+            raise ValueError(ERROR_MSG_INVALID_TIMESTAMP)
+        return default
+    raw = raw.strip()
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(raw)
+    except ValueError as e:
+        raise ValueError(f"{ERROR_MSG_INVALID_TIMESTAMP}: {raw!r}") from e
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Format seconds since the epoch as an ISO 8601 UTC timestamp."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def get_rating_as_of(deal_id: str) -> Any:
+    """
+    Return the latest rating of a deal at `?as_of=` (default: now).
+
+    Returns:
+        Any: JSON response object with the recorded rating, or error details.
+    """
+    if not rating_history.enabled:
+        return create_api_response(msg=ERROR_MSG_HISTORY_DISABLED, status_code=HTTPStatus.NOT_FOUND)
+    record = rating_history.as_of(deal_id, parse_timestamp(request.args.get(AS_OF_PARAM), time.time()))
+    if record is None:
+        return create_api_response(msg=RATING_NOT_FOUND_MSG, status_code=HTTPStatus.NOT_FOUND)
+    data = record._asdict()
+    data[RATED_AT] = format_timestamp(record.rated_at)
+    return create_api_response(msg=SUCCESS_MSG_RATING_HISTORY, status_code=HTTPStatus.OK, data=data)
+
+
+def get_rating_migrations() -> Any:
+    """
+    Return the deals whose rating changed between `?since=` and `?until=` (default: now).
+
+    Returns:
+        Any: JSON response object with the rating migrations, or error details.
+    """
+    if not rating_history.enabled:
+        return create_api_response(msg=ERROR_MSG_HISTORY_DISABLED, status_code=HTTPStatus.NOT_FOUND)
+    since = parse_timestamp(request.args.get(SINCE_PARAM))
+    until = parse_timestamp(request.args.get(UNTIL_PARAM), time.time())
+    migrations = rating_history.migrations(since, until)
+    for migration in migrations:
+        migration[RATED_AT] = format_timestamp(migration[RATED_AT])
+    return create_api_response(
+        msg=SUCCESS_MSG_RATING_HISTORY,
+        status_code=HTTPStatus.OK,
+        data={SINCE_PARAM: format_timestamp(since), UNTIL_PARAM: format_timestamp(until), MIGRATIONS: migrations},
+    )
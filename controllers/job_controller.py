@@ -0,0 +1,115 @@
+import json
+import os
+from functools import partial
+from http import HTTPStatus
+from typing import Any, Dict, Optional
+
+from flask import request
+
+from configs.constants import (
+    CREDIT_RATING, RULE_VERSION, MORTGAGES, JOB_TAPE, JOB_TAPE_DIR_KEY, DEFAULT_JOB_TAPE_DIR, JOB_PRIORITY_PARAM,
+    JOB_PRIORITY_NORMAL, JOB_WAIT_PARAM, JOB_MAX_WAIT, JOB_ACCEPTED_MSG, JOB_STATUS_MSG, JOB_CANCEL_REQUESTED_MSG,
+    ERROR_MSG_INVALID_TAPE, ERROR_MSG_INVALID_JOB_REQUEST,
+)
+from configs.rules import ScoringRules, get_scoring_rules
+from controllers.rating_controller import validate_payload
+from domain.credit_rating import CreditRatingService
+from utils.jobs import Job, job_manager
+from utils.response import create_api_response
+from utils.tenants import Tenant, charge_loans, current_tenant
+
+# Directory holding uploaded loan tapes that jobs may reference by file name
+JOB_TAPE_DIR = os.getenv(JOB_TAPE_DIR_KEY,
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', DEFAULT_JOB_TAPE_DIR))
+
+
+def resolve_tape_path(tape: Any) -> str:
+    """
+    Resolve a tape reference to a file inside the tape directory.
+
+    Args:
+        tape (Any): The tape file name from the request.
+
+    Returns:
+        str: The path of the tape file.
+
+    Raises:
+        ValueError: If the reference is not a plain file name or the file does not exist.
+    """
+    if not isinstance(tape, str) or not tape or os.path.basename(tape) != tape or tape in (os.curdir, os.pardir):
+        raise ValueError(f"{ERROR_MSG_INVALID_TAPE}: {tape!r}")
+    path = os.path.join(JOB_TAPE_DIR, tape)
+    if not os.path.isfile(path):
+        raise ValueError(f"{ERROR_MSG_INVALID_TAPE}: {tape!r}")
+    return path
+
+
+def run_rating_job(job: Job, data: Optional[Dict[str, Any]], tape_path: Optional[str],
+                   rules: ScoringRules, tenant: Optional[Tenant] = None) -> Dict[str, Any]:
+    """
+    Validate and score a pool inside a background job.
+
+    Args:
+        job (Job): The job to report progress on.
+        data (Dict[str, Any], optional): The submitted payload, if the pool was sent inline.
+        tape_path (str, optional): The tape file to load, if the pool was referenced.
+        rules (ScoringRules): The scoring rules active when the job was submitted.
+        tenant (Tenant, optional): The tenant that submitted the job, charged for its loans once they are scored.
+
+    Returns:
+        Dict[str, Any]: The rating result.
+    """
+    if tape_path is not None:
+        with open(tape_path) as tape_file:
+            data = json.load(tape_file)
+    payload = validate_payload(data)
+    job.loans_total = len(payload.mortgages)
+    rating = CreditRatingService(rules).calculate_credit_rating(payload.mortgages,
+                                                                progress_callback=job.report_progress)
+    charge_loans(job.loans_total, tenant)
+    return {CREDIT_RATING: rating, RULE_VERSION: rules.version}
+
+
+def submit_rating_job() -> Any:
+    """
+    Queue a rating job for an inline pool or a referenced tape.
+
+    Returns:
+        Any: JSON response object with the job details.
+    """
+    data = request.json
+    priority = request.args.get(JOB_PRIORITY_PARAM, JOB_PRIORITY_NORMAL)
+
+    tape_path = None
+    if isinstance(data, dict) and JOB_TAPE in data:
+        tape_path = resolve_tape_path(data[JOB_TAPE])
+        data = None
+    elif not isinstance(data, dict) or MORTGAGES not in data:
+        raise ValueError(ERROR_MSG_INVALID_JOB_REQUEST)
+
+    job = job_manager.submit(partial(run_rating_job, data=data, tape_path=tape_path, rules=get_scoring_rules(),
+                                     tenant=current_tenant()), priority)
+    return create_api_response(msg=JOB_ACCEPTED_MSG, status_code=HTTPStatus.ACCEPTED, data=job.as_dict())
+
+
+def get_rating_job(job_id: str) -> Any:
+    """
+    Return the status of a job, long-polling for up to `wait` seconds if requested.
+
+    Returns:
+        Any: JSON response object with the job details and, once finished, its result.
+    """
+    wait = min(float(request.args.get(JOB_WAIT_PARAM, 0)), JOB_MAX_WAIT)
+    job = job_manager.get(job_id, wait=wait)
+    return create_api_response(msg=JOB_STATUS_MSG, status_code=HTTPStatus.OK, data=job.as_dict())
+
+
+def cancel_rating_job(job_id: str) -> Any:
+    """
+    Request cancellation of a job.
+
+    Returns:
+        Any: JSON response object with the job details.
+    """
+    job = job_manager.cancel(job_id)
+    return create_api_response(msg=JOB_CANCEL_REQUESTED_MSG, status_code=HTTPStatus.OK, data=job.as_dict())
@@ -0,0 +1,192 @@
+from http import HTTPStatus
+from typing import Any, Dict, List
+
+from flask import Response, request
+from pydantic import ValidationError
+
+from configs.constants import (
+    VALIDATION_ERROR_MSG, VALIDATION_FAILED_MSG, ERROR_CALCULATING_RATING_MSG, SUCCESS_MSG_PORTFOLIO_RATING,
+    CREDIT_RATING, RULE_VERSION, DEALS, LOAN_COUNT, UNIQUE_LOANS, LOAN_REFERENCES, STAGE_PARSE, STAGE_VALIDATE,
+    STAGE_SCORE, STREAM_PARAM, TRUE_VALUES, DEAL_ID, DEAL_COUNT,
+)
+from controllers.rating_controller import rating_components
+from configs.rules import ScoringRules, get_scoring_rules
+from domain.credit_rating import CreditRatingService, PoolTotals
+from schemas.rmbs import PortfolioPayload
+from utils.hashing import PoolHasher, canonical_loan_fields
+from utils.logger import project_logger
+from utils.rating_history import rating_history
+from utils.response import create_api_response, create_streaming_response
+from utils.tenants import charge_loans
+from utils.timing import stage
+
+
+def validate_portfolio(data: Dict[str, Any]) -> PortfolioPayload:
+    """
+    Validate and parse an incoming portfolio payload.
+
+    Args:
+        data (Dict[str, Any]): The incoming data, expected to match the structure of PortfolioPayload.
+
+    Returns:
+        PortfolioPayload: Parsed payload if valid.
+
+    Raises:
+        ValueError: If the payload is invalid or a deal references an unknown loan.
+    """
+    try:
+        with stage(STAGE_VALIDATE):
+            return PortfolioPayload.model_validate(data)
+    except ValidationError as e:
+        project_logger.error(f"{VALIDATION_ERROR_MSG}: {e.json()}")
+        raise ValueError(f"{VALIDATION_FAILED_MSG}: {e}") from e
+
+
+def calculate_portfolio_totals_service(payload: PortfolioPayload, rules: ScoringRules) -> Dict[str, PoolTotals]:
+    """
+    Service to sum up the pool totals of every deal of a portfolio from a shared per-loan score index.
+
+    Args:
+        payload (PortfolioPayload): The validated portfolio.
+        rules (ScoringRules): The scoring rules to apply.
+
+    Returns:
+        Dict[str, PoolTotals]: The totals of every deal, by deal ID.
+
+    Raises:
+        Exception: If there is any error during the credit rating calculation process.
+    """
+    loans = {loan.loan_id: loan for loan in payload.loans}
+    deals = {deal.deal_id: deal.loan_ids for deal in payload.deals}
+    try:
+        with stage(STAGE_SCORE):
+            return dict(CreditRatingService(rules).iter_portfolio_totals(loans, deals))
+    except Exception as e:
+        project_logger.error(f"{ERROR_CALCULATING_RATING_MSG}: {e}")
+        raise Exception(ERROR_CALCULATING_RATING_MSG) from e
+
+
+def deal_pool_hashes(payload: PortfolioPayload) -> Dict[str, str]:
+    """
+    Digest the pool of every deal for the rating history.
+
+    Each loan is encoded once; a deal's digest is then taken over the encodings of its loans, in deal order, which
+    gives the same canonical pool hash as rating the deal's pool on its own (see `utils.hashing.canonical_pool_hash`).
+
+    Args:
+        payload (PortfolioPayload): The validated portfolio.
+
+    Returns:
+        Dict[str, str]: The hex digest of every deal's pool, by deal ID.
+    """
+    loan_fields = {loan.loan_id: canonical_loan_fields(loan) for loan in payload.loans}
+    hashes = {}
+    for deal in payload.deals:
+        hasher = PoolHasher()
+        deal_fields = zip(*(loan_fields[loan_id] for loan_id in deal.loan_ids))
+        hasher.update_encoded([b"".join(column) for column in deal_fields])
+        hashes[deal.deal_id] = hasher.hexdigest()
+    return hashes
+
+
+def record_deal_rating(service: CreditRatingService, pool_hashes: Dict[str, str], deal_id: str, rating: str,
+                       totals: PoolTotals) -> None:
+    """
+    Record the rating of one deal in the rating history.
+
+    Args:
+        service (CreditRatingService): The service that rated the deal.
+        pool_hashes (Dict[str, str]): The pool digests, see `deal_pool_hashes`.
+        deal_id (str): The deal ID.
+        rating (str): The deal's rating.
+        totals (PoolTotals): The deal's totals.
+    """
+    rating_history.record(pool_hashes[deal_id], service.rule_version, rating, deal_id,
+                          rating_components(service, totals))
+
+
+def summarize_portfolio(deal_loans: Dict[str, List[str]], rules: ScoringRules) -> Dict[str, Any]:
+    """
+    Build the portfolio-level part of the response data.
+
+    Args:
+        deal_loans (Dict[str, List[str]]): The loan IDs of every deal, by deal ID.
+        rules (ScoringRules): The scoring rules applied.
+
+    Returns:
+        Dict[str, Any]: The rule version, the number of distinct loans and the number of loan references.
+    """
+    return {
+        RULE_VERSION: rules.version,
+        UNIQUE_LOANS: len({loan_id for loan_ids in deal_loans.values() for loan_id in loan_ids}),
+        LOAN_REFERENCES: sum(len(loan_ids) for loan_ids in deal_loans.values()),
+    }
+
+
+def stream_portfolio_ratings(payload: PortfolioPayload, rules: ScoringRules) -> Response:
+    """
+    Stream one NDJSON record per deal as soon as the deal is rated, followed by the summary envelope.
+
+    Args:
+        payload (PortfolioPayload): The validated portfolio.
+        rules (ScoringRules): The scoring rules to apply.
+
+    Returns:
+        Response: The streamed response.
+    """
+    loans = {loan.loan_id: loan for loan in payload.loans}
+    deal_loans: Dict[str, List[str]] = {deal.deal_id: deal.loan_ids for deal in payload.deals}
+    service = CreditRatingService(rules)
+    pool_hashes = deal_pool_hashes(payload) if rating_history.enabled else None
+
+    def records():
+        for deal_id, totals in service.iter_portfolio_totals(loans, deal_loans):
+            rating = service.rating_from_totals(*totals)
+            if pool_hashes is not None:
+                record_deal_rating(service, pool_hashes, deal_id, rating, totals)
+            yield {DEAL_ID: deal_id, CREDIT_RATING: rating, LOAN_COUNT: len(deal_loans[deal_id])}
+
+    def summarize():
+        data = summarize_portfolio(deal_loans, rules)
+        data[DEAL_COUNT] = len(deal_loans)
+        return SUCCESS_MSG_PORTFOLIO_RATING, HTTPStatus.OK, data
+
+    return create_streaming_response(records(), summarize)
+
+
+def process_portfolio_rating_request() -> Any:
+    """
+    Process a portfolio rating request: many deals referencing a shared set of loans by ID.
+
+    With `?stream=true` the deals are rated one after the other and the response is streamed as NDJSON, one
+    record per deal, closed by the usual msg/status_code/data envelope. Every deal's rating is recorded in the
+    rating history. Each distinct loan is charged once against the tenant's daily loan quota, as it is scored once.
+
+    Returns:
+        Any: JSON response object with every deal's rating, or error details.
+    """
+    rules = get_scoring_rules()
+    with stage(STAGE_PARSE):
+        data = request.json
+    payload = validate_portfolio(data)
+    charge_loans(len(payload.loans))
+    if request.args.get(STREAM_PARAM, "").strip().lower() in TRUE_VALUES:
+        return stream_portfolio_ratings(payload, rules)
+    deal_totals = calculate_portfolio_totals_service(payload, rules)
+    service = CreditRatingService(rules)
+    ratings = {deal_id: service.rating_from_totals(*totals) for deal_id, totals in deal_totals.items()}
+    if rating_history.enabled:
+        pool_hashes = deal_pool_hashes(payload)
+        for deal_id, totals in deal_totals.items():
+            record_deal_rating(service, pool_hashes, deal_id, ratings[deal_id], totals)
+
+    deal_loans: Dict[str, List[str]] = {deal.deal_id: deal.loan_ids for deal in payload.deals}
+    return create_api_response(
+        msg=SUCCESS_MSG_PORTFOLIO_RATING,
+        status_code=HTTPStatus.OK,
+        data={
+            DEALS: {deal_id: {CREDIT_RATING: rating, LOAN_COUNT: len(deal_loans[deal_id])}
+                    for deal_id, rating in ratings.items()},
+            **summarize_portfolio(deal_loans, rules),
+        },
+    )
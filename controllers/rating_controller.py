@@ -1,17 +1,45 @@
+import hashlib
+import random
 from http import HTTPStatus
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from flask import request
+from flask import Response, request
 from pydantic import ValidationError
 from configs.constants import (
     VALIDATION_ERROR_MSG,
     ERROR_CALCULATING_RATING_MSG,
-    VALIDATION_FAILED_MSG, CREDIT_RATING_NOT_FOUND_MSG, SUCCESS_MSG, CREDIT_RATING
+    VALIDATION_FAILED_MSG, CREDIT_RATING_NOT_FOUND_MSG, SUCCESS_MSG, CREDIT_RATING, RULE_VERSION, MORTGAGES,
+    CONTENT_ENCODING_HEADER, ENCODING_IDENTITY, STAGE_PARSE, STAGE_VALIDATE, STAGE_SCORE, LOANS_EXAMINED,
+    EARLY_EXIT_PARAM, TRUE_VALUES, VALIDATION_MODE_PARAM, VALIDATION_MODE_BULK, MAX_ERRORS_PARAM, SCORE_VALID_PARAM,
+    DEFAULT_MAX_VALIDATION_ERRORS, MAX_VALIDATION_ERRORS_LIMIT, VALIDATION_REPORT,
+    ERROR_MSG_INVALID_MAX_ERRORS, LOG_BULK_VALIDATION, STREAM_PARAM, ERROR_MSG_STREAM_MODE, FIRST_INDEX, RISK_SCORES,
+    LOAN_COUNT, ARROW_STREAM_MIMETYPE, ARROW_CACHE_MODE, ERROR_MSG_ARROW_MODE, COMPONENTS, TOTAL_RISK_SCORE,
+    CREDIT_ADJUSTMENT, DEAL_ID, APPROXIMATE_PARAM, CONFIDENCE_PARAM, DEFAULT_APPROXIMATE_CONFIDENCE, APPROXIMATION,
+    RATING_PROBABILITIES, LOANS_SAMPLED, AVERAGE_CREDIT_SCORE, ESTIMATE, LOWER_BOUND, UPPER_BOUND,
+    ERROR_MSG_APPROXIMATE_MODE, ERROR_MSG_INVALID_CONFIDENCE, SCORING_ENGINE_HEADER, POOL_HASH,
 )
-from domain.credit_rating import CreditRatingService
-from schemas.rmbs import RMBSPayload
+from configs.rules import ScoringRules, get_scoring_rules
+from domain.approximate_rating import ApproximateRater, Interval
+from domain.credit_rating import CreditRatingService, PoolTotals
+from domain.scoring_engines import ScoringEngine, scoring_engines
+from schemas.arrow import MortgageColumns, canonical_columns_hash, read_mortgage_columns
+from schemas.bulk_validation import BulkMortgageValidator
+from schemas.rmbs import Mortgage, RMBSPayload
+from utils.hashing import PoolHasher, canonical_payload_hash, canonical_pool_hash
+from utils.json_stream import StreamingObjectParser
+from utils.admission import estimate_request_cost
 from utils.logger import project_logger
-from utils.response import create_api_response
+from utils.memory import MemoryEstimate, memory_accounting
+from utils.rating_history import rating_history
+from utils.request_body import iter_decoded_body
+from utils.response import create_api_response, create_streaming_response
+from utils.shared_cache import result_cache
+from utils.single_flight import SingleFlight
+from utils.tenants import charge_loans
+from utils.timing import stage
+
+# Coalesces concurrent requests for the same pool (and rule version) into one computation
+rating_single_flight = SingleFlight()
 
 
 def validate_payload(data: Dict[List, Any]) -> RMBSPayload:
@@ -28,46 +56,601 @@ def validate_payload(data: Dict[List, Any]) -> RMBSPayload:
         ValidationError: If the payload is not valid according to the RMBSPayload schema.
     """
     try:
-        return RMBSPayload.model_validate(data)
+        with stage(STAGE_VALIDATE):
+            return RMBSPayload.model_validate(data)
     except ValidationError as e:
         project_logger.error(f"{VALIDATION_ERROR_MSG}: {e.json()}")
         raise ValidationError(f"{VALIDATION_FAILED_MSG}: {e}") from e
 
 
-def calculate_credit_rating_service(mortgages: Dict[str, Any]) -> str:
+def validate_streamed_mortgage(index: int, item: Any) -> Mortgage:
+    """
+    Validate one mortgage of a streamed payload as soon as it has been parsed.
+
+    Args:
+        index (int): Position of the mortgage in the pool.
+        item (Any): The decoded mortgage.
+
+    Returns:
+        Mortgage: The validated mortgage.
+
+    Raises:
+        ValueError: If the mortgage is invalid.
+    """
+    try:
+        return Mortgage.model_validate(item)
+    except ValidationError as e:
+        project_logger.error(f"{VALIDATION_ERROR_MSG} (mortgage {index}): {e.json()}")
+        raise ValueError(f"{VALIDATION_FAILED_MSG}: mortgage {index}") from e
+
+
+def parse_encoded_payload(encoding: str, digest: Any) -> RMBSPayload:
+    """
+    Decode a compressed request body as a stream and validate it mortgage by mortgage.
+
+    Neither the decompressed body nor the raw mortgage dicts are ever held in memory as a whole; only the
+    validated `Mortgage` objects are kept.
+
+    Args:
+        encoding (str): The Content-Encoding of the body.
+        digest (Any): A hashlib object updated with the decompressed bytes.
+
+    Returns:
+        RMBSPayload: The validated payload.
+    """
+    chunks = iter_decoded_body(request.stream, encoding, digest=digest)
+    parser = StreamingObjectParser(chunks, MORTGAGES, validate_streamed_mortgage)
+    data = parser.parse()
+    if MORTGAGES in parser.streamed:
+        return RMBSPayload.model_construct(mortgages=data[MORTGAGES])
+    return validate_payload(data)
+
+
+def parse_encoded_payload_bulk(encoding: str, digest: Any, validator: BulkMortgageValidator) -> None:
+    """
+    Decode a compressed request body as a stream and feed every mortgage to a bulk validator.
+
+    Args:
+        encoding (str): The Content-Encoding of the body.
+        digest (Any): A hashlib object updated with the decompressed bytes.
+        validator (BulkMortgageValidator): Collects the valid mortgages and the validation errors.
+    """
+    chunks = iter_decoded_body(request.stream, encoding, digest=digest)
+    parser = StreamingObjectParser(chunks, MORTGAGES, validator.add)
+    data = parser.parse()
+    if MORTGAGES not in parser.streamed:
+        # Not a pool at all: fail exactly like the default validation mode
+        validator.extend(validate_payload(data).mortgages)
+
+
+def get_bulk_validation_args() -> Tuple[int, bool]:
+    """
+    Read the bulk validation options from the query string.
+
+    Returns:
+        Tuple[int, bool]: The maximum number of errors to report and whether the valid mortgages should be scored
+        when some are invalid.
+
+    Raises:
+        ValueError: If `max_errors` is not a positive integer.
+    """
+    raw = request.args.get(MAX_ERRORS_PARAM)
+    try:
+        max_errors = DEFAULT_MAX_VALIDATION_ERRORS if raw is None else int(raw)
+    except ValueError:
+        max_errors = 0
+    if max_errors < 1:
+        raise ValueError(f"{ERROR_MSG_INVALID_MAX_ERRORS}: {raw!r}")
+    score_valid = request.args.get(SCORE_VALID_PARAM, "").strip().lower() in TRUE_VALUES
+    return min(max_errors, MAX_VALIDATION_ERRORS_LIMIT), score_valid
+
+
+def get_approximate_confidence() -> float:
+    """
+    Read the confidence an approximate rating must reach from the query string.
+
+    Returns:
+        float: The requested confidence.
+
+    Raises:
+        ValueError: If `confidence` is not a number between 0 and 1, exclusive.
+    """
+    raw = request.args.get(CONFIDENCE_PARAM)
+    try:
+        confidence = DEFAULT_APPROXIMATE_CONFIDENCE if raw is None else float(raw)
+    except ValueError:
+        confidence = 0.0
+    if not 0 < confidence < 1:
+        raise ValueError(f"{ERROR_MSG_INVALID_CONFIDENCE}: {raw!r}")
+    return confidence
+
+
+def get_scoring_engine() -> Optional[ScoringEngine]:
+    """
+    Read the scoring engine asked for in the `X-Scoring-Engine` header.
+
+    Returns:
+        Optional[ScoringEngine]: The engine, or None to use the fastest engine for the pool's size.
+
+    Raises:
+        ValueError: If the engine is unknown or unavailable.
+    """
+    return scoring_engines.resolve(request.headers.get(SCORING_ENGINE_HEADER))
+
+
+def rating_components(service: CreditRatingService, totals: PoolTotals) -> Dict[str, int]:
+    """
+    Break a pool's rating down into the figures it was derived from.
+
+    Args:
+        service (CreditRatingService): The service that scored the pool.
+        totals (PoolTotals): The pool's totals.
+
+    Returns:
+        Dict[str, int]: The summed risk scores, the average credit score adjustment and the number of loans.
+    """
+    return {
+        TOTAL_RISK_SCORE: totals.total_score,
+        CREDIT_ADJUSTMENT: service.average_credit_adjustment(totals.credit_score_sum / totals.loan_count),
+        LOAN_COUNT: totals.loan_count,
+    }
+
+
+def calculate_credit_rating_service(mortgages: List, rules: Optional[ScoringRules] = None,
+                                    engine: Optional[ScoringEngine] = None) -> Tuple[str, Dict[str, int]]:
     """
     Service to calculate credit rating based on mortgage data.
 
     Args:
-        mortgages (Dict[str, Any]): The mortgage data, expected to be a dictionary containing mortgage details.
+        mortgages (List[Mortgage]): The validated mortgages.
+        rules (ScoringRules, optional): The scoring rules to apply. Defaults to the currently active rules.
+        engine (ScoringEngine, optional): The engine to score with. Defaults to the fastest for the pool's size.
+
+    Returns:
+        Tuple[str, Dict[str, int]]: The calculated credit rating and its components, see `rating_components`.
+
+    Raises:
+        Exception: If there is any error during the credit rating calculation process.
+    """
+    try:
+        with stage(STAGE_SCORE):
+            service = CreditRatingService(rules, engine)
+            totals = service.calculate_pool_totals(mortgages)
+            return service.rating_from_totals(*totals), rating_components(service, totals)
+    except Exception as e:
+        project_logger.error(f"{ERROR_CALCULATING_RATING_MSG}: {e}")
+        raise Exception(ERROR_CALCULATING_RATING_MSG) from e
+
+
+def calculate_credit_rating_early_exit_service(mortgages: List, rules: ScoringRules) -> Tuple[str, int]:
+    """
+    Service to calculate credit rating, stopping as soon as the rating is settled.
+
+    Args:
+        mortgages (List[Mortgage]): The validated mortgages.
+        rules (ScoringRules): The scoring rules to apply.
 
     Returns:
-        float: The calculated credit rating based on the mortgage data.
+        Tuple[str, int]: The calculated credit rating and the number of mortgages examined.
 
     Raises:
         Exception: If there is any error during the credit rating calculation process.
     """
     try:
-        return CreditRatingService().calculate_credit_rating(mortgages)
+        with stage(STAGE_SCORE):
+            return CreditRatingService(rules).calculate_credit_rating_early_exit(mortgages)
+    except Exception as e:
+        project_logger.error(f"{ERROR_CALCULATING_RATING_MSG}: {e}")
+        raise Exception(ERROR_CALCULATING_RATING_MSG) from e
+
+
+def rate_mortgages(mortgages: List, rules: ScoringRules, early_exit: bool = False,
+                   engine: Optional[ScoringEngine] = None) -> Dict[str, Any]:
+    """
+    Calculate the credit rating of validated mortgages and build the response data.
+
+    Args:
+        mortgages (List[Mortgage]): The validated mortgages.
+        rules (ScoringRules): The scoring rules to apply.
+        early_exit (bool): Stop scoring once the rating can no longer change.
+        engine (ScoringEngine, optional): The engine to score with, unless exiting early. Defaults to the fastest
+            for the pool's size.
+
+    Returns:
+        Dict[str, Any]: The rating, the rule version and either its components or, in early-exit mode, the number
+        of loans examined; while the rating history is enabled, also the canonical pool hash it is recorded under.
+    """
+    if early_exit:
+        rating, examined = calculate_credit_rating_early_exit_service(mortgages, rules)
+        result = {CREDIT_RATING: rating, RULE_VERSION: rules.version, LOANS_EXAMINED: examined}
+    else:
+        rating, components = calculate_credit_rating_service(mortgages, rules, engine)
+        result = {CREDIT_RATING: rating, RULE_VERSION: rules.version, COMPONENTS: components}
+    if rating_history.enabled:
+        result[POOL_HASH] = canonical_pool_hash(mortgages)
+    return result
+
+
+def rate_columns(columns: MortgageColumns, rules: ScoringRules) -> Dict[str, Any]:
+    """
+    Calculate the credit rating of a pool sent as Arrow columns and build the response data.
+
+    Args:
+        columns (MortgageColumns): The validated columns.
+        rules (ScoringRules): The scoring rules to apply.
+
+    Returns:
+        Dict[str, Any]: The response data, see `rate_mortgages`.
+    """
+    try:
+        with stage(STAGE_SCORE):
+            service = CreditRatingService(rules)
+            totals = service.calculate_pool_totals_columns(columns)
+            rating = service.rating_from_totals(*totals)
+    except Exception as e:
+        project_logger.error(f"{ERROR_CALCULATING_RATING_MSG}: {e}")
+        raise Exception(ERROR_CALCULATING_RATING_MSG) from e
+    result = {CREDIT_RATING: rating, RULE_VERSION: rules.version, COMPONENTS: rating_components(service, totals)}
+    if rating_history.enabled:
+        result[POOL_HASH] = canonical_columns_hash(columns)
+    return result
+
+
+def rate_payload(data: Dict[str, Any], rules: ScoringRules, early_exit: bool = False,
+                 engine: Optional[ScoringEngine] = None) -> Dict[str, Any]:
+    """
+    Validate a raw payload and calculate its credit rating.
+
+    Args:
+        data (Dict[str, Any]): The incoming data, expected to match the structure of RMBSPayload.
+        rules (ScoringRules): The scoring rules to apply.
+        early_exit (bool): Stop scoring once the rating can no longer change.
+        engine (ScoringEngine, optional): See `rate_mortgages`.
+
+    Returns:
+        Dict[str, Any]: The response data, see `rate_mortgages`.
+    """
+    payload = validate_payload(data)
+    return rate_mortgages(payload.mortgages, rules, early_exit, engine)
+
+
+def rate_validated_mortgages(validator: BulkMortgageValidator, rules: ScoringRules, early_exit: bool = False,
+                             score_valid: bool = False, engine: Optional[ScoringEngine] = None) -> Dict[str, Any]:
+    """
+    Score the mortgages accepted by a bulk validator and attach its validation report.
+
+    Args:
+        validator (BulkMortgageValidator): The validator the pool was fed to.
+        rules (ScoringRules): The scoring rules to apply.
+        early_exit (bool): Stop scoring once the rating can no longer change.
+        score_valid (bool): Score the valid subset even if some mortgages are invalid.
+        engine (ScoringEngine, optional): See `rate_mortgages`.
+
+    Returns:
+        Dict[str, Any]: The response data of `rate_mortgages` plus the validation report. The rating is left out
+        when invalid mortgages were found and the valid subset was not to be (or could not be) scored.
+    """
+    report = validator.report()
+    if validator.invalid_count:
+        project_logger.warning(f"{LOG_BULK_VALIDATION}: {validator.invalid_count} of "
+                               f"{validator.invalid_count + len(validator.valid)}")
+        if not score_valid or not validator.valid:
+            return {RULE_VERSION: rules.version, VALIDATION_REPORT: report}
+    result = rate_mortgages(validator.valid, rules, early_exit, engine)
+    result[VALIDATION_REPORT] = report
+    return result
+
+
+def rate_payload_bulk(data: Dict[str, Any], rules: ScoringRules, early_exit: bool = False,
+                      max_errors: int = DEFAULT_MAX_VALIDATION_ERRORS, score_valid: bool = False,
+                      engine: Optional[ScoringEngine] = None) -> Dict[str, Any]:
+    """
+    Validate a raw payload in bulk mode and calculate its credit rating.
+
+    Args:
+        data (Dict[str, Any]): The incoming data, expected to match the structure of RMBSPayload.
+        rules (ScoringRules): The scoring rules to apply.
+        early_exit (bool): Stop scoring once the rating can no longer change.
+        max_errors (int): Maximum number of field errors to report.
+        score_valid (bool): Score the valid subset even if some mortgages are invalid.
+        engine (ScoringEngine, optional): See `rate_mortgages`.
+
+    Returns:
+        Dict[str, Any]: The response data, see `rate_validated_mortgages`.
+    """
+    validator = BulkMortgageValidator(max_errors)
+    with stage(STAGE_VALIDATE):
+        mortgages = data.get(MORTGAGES) if isinstance(data, dict) else None
+        if isinstance(mortgages, list):
+            validator.extend(mortgages)
+        else:
+            # Not a pool at all: fail exactly like the default validation mode
+            validator.extend(validate_payload(data).mortgages)
+    return rate_validated_mortgages(validator, rules, early_exit, score_valid, engine)
+
+
+def rate_body_incrementally(encoding: str, digest: Any, rules: ScoringRules) -> Dict[str, Any]:
+    """
+    Validate and score every mortgage of the request body while it is parsed, keeping none of them.
+
+    Memory stays at the parser's buffers however large the pool is. In exchange, the request cannot be coalesced
+    with identical in-flight ones: its hash is only known once it has been scored.
+
+    Args:
+        encoding (str): The Content-Encoding of the body.
+        digest (Any): A hashlib object updated with the decoded bytes.
+        rules (ScoringRules): The scoring rules to apply.
+
+    Returns:
+        Dict[str, Any]: The response data, see `rate_mortgages`.
+    """
+    service = CreditRatingService(rules)
+    total_score = credit_score_sum = loan_count = 0
+    hasher = PoolHasher() if rating_history.enabled else None
+
+    def score(index: int, item: Any) -> None:
+        nonlocal total_score, credit_score_sum, loan_count
+        mortgage = validate_streamed_mortgage(index, item)
+        if hasher is not None:
+            hasher.update(mortgage)
+        total_score += service.calculate_risk_score(mortgage)
+        credit_score_sum += mortgage.credit_score
+        loan_count += 1
+
+    with stage(STAGE_PARSE):
+        parser = StreamingObjectParser(iter_decoded_body(request.stream, encoding, digest=digest), MORTGAGES, score)
+        data = parser.parse()
+    if MORTGAGES not in parser.streamed:
+        # Not a pool at all: fail exactly like the default path
+        return rate_payload(data, rules)
+    try:
+        totals = PoolTotals(total_score, credit_score_sum, loan_count)
+        rating = service.rating_from_totals(*totals)
+        components = rating_components(service, totals)
     except Exception as e:
         project_logger.error(f"{ERROR_CALCULATING_RATING_MSG}: {e}")
         raise Exception(ERROR_CALCULATING_RATING_MSG) from e
+    result = {CREDIT_RATING: rating, RULE_VERSION: rules.version, COMPONENTS: components}
+    if hasher is not None:
+        result[POOL_HASH] = hasher.hexdigest()
+    return result
+
+
+def rate_approximately(data: Any, rules: ScoringRules, confidence: float, seed: int) -> Dict[str, Any]:
+    """
+    Estimate the credit rating of a raw payload from a stratified random sample of its mortgages.
+
+    Only the sampled mortgages are validated and scored, see `domain.approximate_rating.ApproximateRater`; an
+    invalid mortgage outside the sample goes unnoticed.
+
+    Args:
+        data (Any): The decoded payload, expected to match the structure of RMBSPayload.
+        rules (ScoringRules): The scoring rules to apply.
+        confidence (float): The probability the reported rating must reach.
+        seed (int): Seeds the sample, so that the same pool always gets the same estimate.
+
+    Returns:
+        Dict[str, Any]: The most probable rating, the rule version and the approximation: the probability of
+        every rating, the number of loans sampled and the estimated total risk score and average credit score.
+    """
+    mortgages = data.get(MORTGAGES) if isinstance(data, dict) else None
+    if not isinstance(mortgages, list):
+        # Not a pool at all: fail exactly like the default path
+        mortgages = validate_payload(data).mortgages
+    with stage(STAGE_SCORE):
+        estimate = ApproximateRater(CreditRatingService(rules)).estimate(
+            mortgages, confidence, validate_streamed_mortgage, random.Random(seed))
+
+    def bounds(interval: Interval) -> Dict[str, float]:
+        return {ESTIMATE: interval.estimate, LOWER_BOUND: interval.lower, UPPER_BOUND: interval.upper}
+
+    return {CREDIT_RATING: estimate.rating, RULE_VERSION: rules.version, APPROXIMATION: {
+        CONFIDENCE_PARAM: estimate.probabilities[estimate.rating],
+        RATING_PROBABILITIES: estimate.probabilities,
+        LOANS_SAMPLED: estimate.sampled,
+        LOAN_COUNT: estimate.loan_count,
+        TOTAL_RISK_SCORE: bounds(estimate.total_score),
+        AVERAGE_CREDIT_SCORE: bounds(estimate.average_credit_score),
+    }}
+
+
+def loans_scored(result: Dict[str, Any]) -> int:
+    """
+    The number of loans a rating was computed from, as charged against the tenant's daily loan quota.
+
+    Args:
+        result (Dict[str, Any]): The response data of a successful rating.
+
+    Returns:
+        int: The loans scored: all of them, those examined before an early exit or those sampled.
+    """
+    if LOANS_EXAMINED in result:
+        return result[LOANS_EXAMINED]
+    if APPROXIMATION in result:
+        return result[APPROXIMATION][LOANS_SAMPLED]
+    return result.get(COMPONENTS, {}).get(LOAN_COUNT, 0)
+
+
+def rate_once(key: str, func: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """
+    Return the result for a pool from the shared result cache, or compute it once per distinct in-flight pool.
+
+    Args:
+        key (str): The rule version prefixed pool hash and rating mode, see `ScoringRules.cache_key`.
+        func (Callable[..., Dict[str, Any]]): Computes the response data from `args` on a cache miss.
+
+    Returns:
+        Dict[str, Any]: The response data.
+    """
+    result = result_cache.get(key)
+    if result is None:
+        result, shared = rating_single_flight.do(key, func, *args)
+        # Only the leader stores the result; followers got the very same one
+        if not shared:
+            result_cache.put(key, result)
+    return result
+
+
+def stream_credit_rating(mortgages: List, rules: ScoringRules) -> Response:
+    """
+    Stream the per-loan risk scores of a pool as NDJSON, one record per chunk of mortgages as soon as it is scored,
+    followed by the usual envelope carrying the pool's rating.
+
+    Args:
+        mortgages (List[Mortgage]): The validated mortgages.
+        rules (ScoringRules): The scoring rules to apply.
+
+    Returns:
+        Response: The streamed response.
+    """
+    service = CreditRatingService(rules)
+    total_score = 0
+
+    def records():
+        nonlocal total_score
+        for first, scores in service.iter_risk_score_chunks(mortgages):
+            total_score += sum(scores)
+            yield {FIRST_INDEX: first, RISK_SCORES: scores}
+
+    def summarize():
+        credit_score_sum = sum(m.credit_score for m in mortgages)
+        rating = service.rating_from_totals(total_score, credit_score_sum, len(mortgages))
+        return SUCCESS_MSG, HTTPStatus.OK, {CREDIT_RATING: rating, RULE_VERSION: rules.version,
+                                            LOAN_COUNT: len(mortgages)}
+
+    return create_streaming_response(records(), summarize)
 
 
 def process_credit_rating_request() -> Any:
     """
     Process the credit rating calculation request.
 
+    Results are kept in the shared result cache, and concurrent requests with an identical payload share a single
+    validation and scoring run. Bodies sent with a `Content-Encoding` (gzip, br, zstd) are decompressed and
+    validated as a stream. With `?early_exit=true` scoring stops as soon as the rating is settled and the response
+    reports how many loans were examined. With `?validation=bulk` every mortgage is validated in one pass and the
+    response carries a row-indexed validation report; invalid pools are answered with 422 unless
+    `?score_valid=true` asks for the valid subset to be scored. With `?stream=true` the per-loan risk scores are
+    streamed as NDJSON while the pool is scored, see `stream_credit_rating`. With `?approximate=true` the rating
+    is estimated from a random sample of the mortgages, grown until the reported rating is at least
+    `?confidence=` (default 0.95) likely, see `rate_approximately`; approximate ratings are not recorded in the
+    rating history.
+
+    A body sent as `application/vnd.apache.arrow.stream` holds the pool as Arrow columns named after the mortgage
+    fields; it is validated and scored column by column, see `schemas.arrow.read_mortgage_columns`.
+
+    Before the body is read, the request's memory needs are estimated from its Content-Length against the
+    per-request budget. A JSON pool that would not fit, or whose size is unknown, is validated and scored while it
+    is parsed instead, see `rate_body_incrementally`; requests that cannot be rated that way (Arrow bodies and the
+    early-exit, bulk validation, streaming and approximate modes) are rejected with 413 when they would not fit.
+
+    Pools are scored by the fastest engine for their size unless the `X-Scoring-Engine` header names one, see
+    `domain.scoring_engines`; results are the same whichever engine computes them, so they are cached and
+    coalesced regardless of it.
+
+    Every rating is recorded in the rating history, under the deal given with `?deal_id=` if any, and its loans
+    are charged against the daily loan quota of the request's tenant, see `loans_scored`.
+
     Returns:
         Any: JSON response object with the result or error details.
     """
-    # Parse and validate payload
-    payload = validate_payload(request.json)
+    # Pin the rules for the whole request so a concurrent reload cannot change them mid-way
+    rules = get_scoring_rules()
+    engine = get_scoring_engine()
+    early_exit = request.args.get(EARLY_EXIT_PARAM, "").strip().lower() in TRUE_VALUES
+    mode = EARLY_EXIT_PARAM if early_exit else ""
+    bulk = request.args.get(VALIDATION_MODE_PARAM, "").strip().lower() == VALIDATION_MODE_BULK
+    if bulk:
+        max_errors, score_valid = get_bulk_validation_args()
+        mode = f"{mode}:{VALIDATION_MODE_BULK}:{max_errors}:{score_valid}"
+
+    encoding = request.headers.get(CONTENT_ENCODING_HEADER, "").strip().lower() or ENCODING_IDENTITY
+    stream = request.args.get(STREAM_PARAM, "").strip().lower() in TRUE_VALUES
+    arrow = request.mimetype == ARROW_STREAM_MIMETYPE
+    approximate = request.args.get(APPROXIMATE_PARAM, "").strip().lower() in TRUE_VALUES
+    if approximate:
+        if early_exit or bulk or stream or arrow:
+            raise ValueError(ERROR_MSG_APPROXIMATE_MODE)
+        confidence = get_approximate_confidence()
+        mode = f"{APPROXIMATE_PARAM}:{confidence}"
+    loans = estimate_request_cost(request.content_length, encoding).loans
+    incremental = memory_accounting.check_budget(
+        MemoryEstimate(loans, request.content_length, arrow),
+        incremental_possible=not (arrow or early_exit or bulk or stream or approximate))
+    if arrow:
+        if early_exit or bulk or stream:
+            raise ValueError(ERROR_MSG_ARROW_MODE)
+        digest = hashlib.sha256()
+        with stage(STAGE_PARSE):
+            columns = read_mortgage_columns(b"".join(iter_decoded_body(request.stream, encoding, digest=digest)))
+        pool_hash = digest.hexdigest()
+        key = rules.cache_key(f"{pool_hash}:{ARROW_CACHE_MODE}")
+        result = rate_once(key, rate_columns, columns, rules)
+    elif stream:
+        if early_exit or bulk:
+            raise ValueError(ERROR_MSG_STREAM_MODE)
+        # Validation errors are still reported with a regular response, before anything is streamed
+        with stage(STAGE_PARSE):
+            if encoding != ENCODING_IDENTITY:
+                mortgages = parse_encoded_payload(encoding, None).mortgages
+            else:
+                mortgages = validate_payload(request.json).mortgages
+        charge_loans(len(mortgages))
+        return stream_credit_rating(mortgages, rules)
+    elif approximate:
+        # The mortgages are decoded but not validated; only the sampled ones ever are
+        with stage(STAGE_PARSE):
+            if encoding != ENCODING_IDENTITY:
+                digest = hashlib.sha256()
+                chunks = iter_decoded_body(request.stream, encoding, digest=digest)
+                data = StreamingObjectParser(chunks, MORTGAGES, lambda index, item: item).parse()
+                pool_hash = digest.hexdigest()
+            else:
+                data = request.json
+                pool_hash = canonical_payload_hash(data)
+        key = rules.cache_key(f"{pool_hash}:{mode}")
+        result = rate_once(key, rate_approximately, data, rules, confidence, int(pool_hash[:16], 16))
+    elif incremental:
+        digest = hashlib.sha256()
+        result = rate_body_incrementally(encoding, digest, rules)
+        if encoding != ENCODING_IDENTITY:
+            # Uncompressed bodies are looked up by their canonical payload hash, which is never computed here
+            result_cache.put(rules.cache_key(f"{digest.hexdigest()}:{mode}"), result)
+    elif encoding != ENCODING_IDENTITY:
+        # Streamed bodies are validated while decoding; identical pools still share the scoring run
+        digest = hashlib.sha256()
+        if bulk:
+            validator = BulkMortgageValidator(max_errors)
+            with stage(STAGE_PARSE):
+                parse_encoded_payload_bulk(encoding, digest, validator)
+            pool_hash = digest.hexdigest()
+            key = rules.cache_key(f"{pool_hash}:{mode}")
+            result = rate_once(key, rate_validated_mortgages, validator, rules, early_exit, score_valid, engine)
+        else:
+            with stage(STAGE_PARSE):
+                payload = parse_encoded_payload(encoding, digest)
+            pool_hash = digest.hexdigest()
+            key = rules.cache_key(f"{pool_hash}:{mode}")
+            result = rate_once(key, rate_mortgages, payload.mortgages, rules, early_exit, engine)
+    else:
+        # Parse, validate and compute credit rating, once per distinct in-flight payload
+        with stage(STAGE_PARSE):
+            data = request.json
+        pool_hash = canonical_payload_hash(data)
+        key = rules.cache_key(f"{pool_hash}:{mode}")
+        if bulk:
+            result = rate_once(key, rate_payload_bulk, data, rules, early_exit, max_errors, score_valid, engine)
+        else:
+            result = rate_once(key, rate_payload, data, rules, early_exit, engine)
 
-    # Compute credit rating
-    rating = calculate_credit_rating_service(payload.mortgages)
+    if CREDIT_RATING not in result:
+        return create_api_response(
+            msg=VALIDATION_ERROR_MSG,
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            data=result,
+        )
 
-    if not rating:
+    if not result[CREDIT_RATING]:
         project_logger.warning(CREDIT_RATING_NOT_FOUND_MSG)
         return create_api_response(
             msg=CREDIT_RATING_NOT_FOUND_MSG,
@@ -75,8 +658,14 @@ def process_credit_rating_request() -> Any:
             data={},
         )
 
+    # Cached and coalesced results are charged too, so a tenant's usage does not depend on other tenants' requests
+    charge_loans(loans_scored(result))
+    # Recorded under the canonical pool hash, so that a pool's ratings correlate whatever encoding it was sent in
+    if POOL_HASH in result:
+        rating_history.record(result[POOL_HASH], result[RULE_VERSION], result[CREDIT_RATING],
+                              request.args.get(DEAL_ID), result.get(COMPONENTS))
     return create_api_response(
         msg=SUCCESS_MSG,
         status_code=HTTPStatus.OK,
-        data={CREDIT_RATING: rating},
+        data=result,
     )
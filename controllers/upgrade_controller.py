@@ -0,0 +1,76 @@
+from http import HTTPStatus
+from typing import Any, Tuple
+
+from flask import request
+
+from configs.constants import (
+    ERROR_CALCULATING_RATING_MSG, SUCCESS_MSG_UPGRADE_PLAN, CREDIT_RATING, RULE_VERSION, RATINGS_BEST_FIRST,
+    OBJECTIVES, OBJECTIVE_COUNT, TARGET_RATING_PARAM, OBJECTIVE_PARAM, TARGET_RATING, ACHIEVABLE, OPTIMIZED_RATING,
+    REMOVED_LOANS, REMOVED_COUNT, REMOVED_PRINCIPAL, REMAINING_LOANS, ERROR_MSG_INVALID_TARGET_RATING,
+    ERROR_MSG_INVALID_OBJECTIVE, STAGE_PARSE, STAGE_SCORE,
+)
+from configs.rules import get_scoring_rules
+from controllers.rating_controller import validate_payload
+from domain.credit_rating import CreditRatingService
+from domain.upgrade_optimizer import UpgradeOptimizer, UpgradePlan
+from utils.logger import project_logger
+from utils.response import create_api_response
+from utils.tenants import charge_loans
+from utils.timing import stage
+
+
+def get_upgrade_args() -> Tuple[str, str]:
+    """
+    Read the target rating and the objective of an upgrade plan request from the query string.
+
+    Returns:
+        Tuple[str, str]: The target rating and the objective.
+
+    Raises:
+        ValueError: If the target rating or the objective is missing or unknown.
+    """
+    target = request.args.get(TARGET_RATING_PARAM, "").strip().upper()
+    if target not in RATINGS_BEST_FIRST:
+        raise ValueError(f"{ERROR_MSG_INVALID_TARGET_RATING} {', '.join(RATINGS_BEST_FIRST)}")
+    objective = request.args.get(OBJECTIVE_PARAM, OBJECTIVE_COUNT).strip().lower()
+    if objective not in OBJECTIVES:
+        raise ValueError(f"{ERROR_MSG_INVALID_OBJECTIVE} {', '.join(OBJECTIVES)}")
+    return target, objective
+
+
+def process_upgrade_plan_request() -> Any:
+    """
+    Process an upgrade plan request: which loans to remove from a pool to reach a target rating.
+
+    Returns:
+        Any: JSON response object with the current rating and the loans to remove, or error details.
+    """
+    target, objective = get_upgrade_args()
+    rules = get_scoring_rules()
+    with stage(STAGE_PARSE):
+        data = request.json
+    mortgages = validate_payload(data).mortgages
+
+    try:
+        with stage(STAGE_SCORE):
+            plan: UpgradePlan = UpgradeOptimizer(CreditRatingService(rules)).optimize(mortgages, target, objective)
+    except Exception as e:
+        project_logger.error(f"{ERROR_CALCULATING_RATING_MSG}: {e}")
+        raise Exception(ERROR_CALCULATING_RATING_MSG) from e
+
+    charge_loans(len(mortgages))
+    return create_api_response(
+        msg=SUCCESS_MSG_UPGRADE_PLAN,
+        status_code=HTTPStatus.OK,
+        data={
+            CREDIT_RATING: plan.current,
+            TARGET_RATING: target,
+            ACHIEVABLE: plan.achievable,
+            OPTIMIZED_RATING: plan.rating,
+            REMOVED_LOANS: plan.removed,
+            REMOVED_COUNT: len(plan.removed),
+            REMOVED_PRINCIPAL: plan.removed_principal,
+            REMAINING_LOANS: len(mortgages) - len(plan.removed),
+            RULE_VERSION: rules.version,
+        },
+    )
@@ -0,0 +1,247 @@
+import math
+import random
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+from configs.constants import (
+    RATING_AAA, RATING_BBB, RATING_C, RATINGS_BEST_FIRST, DEFAULT_APPROXIMATE_CONFIDENCE, APPROXIMATE_INITIAL_SAMPLE,
+    APPROXIMATE_SAMPLE_GROWTH, APPROXIMATE_GRID_STEP, APPROXIMATE_GRID_LIMIT, ERROR_MSG_APPROXIMATE_RATING,
+)
+from domain.credit_rating import CreditRatingService
+from utils.logger import project_logger
+
+_STANDARD_NORMAL = NormalDist()
+
+
+def _integration_grid() -> List[Tuple[float, float]]:
+    # Midpoints of a standard normal split into equal steps, with the probability of each step
+    steps = int(2 * APPROXIMATE_GRID_LIMIT / APPROXIMATE_GRID_STEP)
+    points = [-APPROXIMATE_GRID_LIMIT + (i + 0.5) * APPROXIMATE_GRID_STEP for i in range(steps)]
+    weights = [_STANDARD_NORMAL.pdf(z) for z in points]
+    total = sum(weights)
+    return [(z, weight / total) for z, weight in zip(points, weights)]
+
+
+_GRID = _integration_grid()
+
+
+class Interval(NamedTuple):
+    """A point estimate and its confidence interval."""
+    estimate: float
+    lower: float
+    upper: float
+
+
+class RatingEstimate(NamedTuple):
+    """Rating of a pool estimated from a random sample of its loans."""
+    rating: str  # The most probable rating
+    probabilities: Dict[str, float]  # Probability of every rating, best first
+    sampled: int  # Loans validated and scored
+    loan_count: int
+    total_score: Interval  # Summed risk scores of the pool
+    average_credit_score: Interval
+
+
+class _Stratum:
+    """The loans of one stratum, drawn without replacement, and the running sums of the drawn ones."""
+
+    def __init__(self):
+        self.indices: List[int] = []
+        self.drawn = 0
+        # Sums of the risk score y, the credit score c and their squares and product over the drawn loans
+        self.y = self.yy = self.c = self.cc = self.yc = 0
+
+    def draw(self, count: int, rng: random.Random) -> List[int]:
+        # Partial Fisher-Yates shuffle: only the drawn positions are ever shuffled
+        indices = self.indices
+        end = min(self.drawn + count, len(indices))
+        for position in range(self.drawn, end):
+            swap = rng.randrange(position, len(indices))
+            indices[position], indices[swap] = indices[swap], indices[position]
+        drawn = indices[self.drawn:end]
+        self.drawn = end
+        return drawn
+
+    def add(self, risk_score: int, credit_score: int) -> None:
+        self.y += risk_score
+        self.yy += risk_score * risk_score
+        self.c += credit_score
+        self.cc += credit_score * credit_score
+        self.yc += risk_score * credit_score
+
+    def moments(self) -> Tuple[float, float, float, float, float, float]:
+        """Sampling factor, the drawn sums scaled up to the stratum, and the per-loan variances and covariance."""
+        size, n = len(self.indices), self.drawn
+        # Finite population correction: a fully drawn stratum is known exactly
+        factor = (1 - n / size) / n
+        if n > 1:
+            var_y = (self.yy - self.y * self.y / n) / (n - 1)
+            var_c = (self.cc - self.c * self.c / n) / (n - 1)
+            cov = (self.yc - self.y * self.c / n) / (n - 1)
+        else:
+            var_y = var_c = cov = 0.0
+        return factor, size * self.y / n, size * self.c / n, var_y, var_c, cov
+
+
+class ApproximateRater:
+    """
+    Estimates the rating of a large pool from a stratified random sample of its loans.
+
+    Loans are split into strata by loan type, property type and credit score band, which are read from the raw
+    loans without validating them; together they decide three of the five risk score components. Each round
+    draws the same share of every stratum (at least two loans each), validates and scores only the drawn loans,
+    and estimates the pool's total risk score and average credit score with their variances and covariance,
+    finite population correction included.
+
+    The rating is a step function of the total plus the average credit adjustment, which is itself a step
+    function of the average credit score. Treating both estimates as jointly normal, the probability of each
+    rating is integrated over the average credit score, with the total conditioned on it. The sample grows by
+    `APPROXIMATE_SAMPLE_GROWTH` until the most probable rating reaches the requested confidence; a pool sampled
+    in full is rated exactly.
+    """
+
+    def __init__(self, service: Optional[CreditRatingService] = None,
+                 initial_sample: int = APPROXIMATE_INITIAL_SAMPLE):
+        """
+        Initialize the rater.
+
+        Args:
+            service (CreditRatingService, optional): Service to score and rate with. Defaults to one using the
+                currently active rules.
+            initial_sample (int): Loans drawn in the first round.
+        """
+        self.service = service or CreditRatingService()
+        self.initial_sample = initial_sample
+        self._credit_score_good = self.service.rules.credit_score_good
+        self._credit_score_poor = self.service.rules.credit_score_poor
+
+    def stratum(self, loan: Any) -> Hashable:
+        """
+        The stratum of a loan, read from a raw (decoded JSON) or validated loan; unexpected values form strata of
+        their own and are left for validation to reject.
+
+        Args:
+            loan (Any): The loan.
+
+        Returns:
+            Hashable: The loan type, property type and credit score band of the loan.
+        """
+        if isinstance(loan, dict):
+            loan_type, property_type, credit_score = (loan.get("loan_type"), loan.get("property_type"),
+                                                      loan.get("credit_score"))
+        else:
+            loan_type, property_type, credit_score = loan.loan_type, loan.property_type, loan.credit_score
+        # Called once for every loan of the pool, hence the exact type checks rather than isinstance
+        if type(credit_score) in (int, float):
+            band = (credit_score >= self._credit_score_good) - (credit_score < self._credit_score_poor)
+        else:
+            band = None
+        return (loan_type if type(loan_type) is str else None,
+                property_type if type(property_type) is str else None, band)
+
+    def estimate(self, mortgages: Sequence, confidence: float = DEFAULT_APPROXIMATE_CONFIDENCE,
+                 prepare: Optional[Callable[[int, Any], Any]] = None,
+                 rng: Optional[random.Random] = None) -> RatingEstimate:
+        """
+        Estimate the rating of a pool, sampling until the most probable rating is at least `confidence` likely.
+
+        Args:
+            mortgages (Sequence): The pool, as validated mortgages or as raw loans together with `prepare`.
+            confidence (float): The probability the reported rating must reach, between 0 and 1 exclusive. The
+                intervals of the estimate are reported at the same confidence level.
+            prepare (Callable[[int, Any], Any], optional): Validates a sampled loan, given its position and the
+                loan, and returns the mortgage to score. Only sampled loans are passed to it.
+            rng (random.Random, optional): The source of randomness, for reproducible samples.
+
+        Returns:
+            RatingEstimate: The most probable rating, the probability of every rating and the estimates.
+
+        Raises:
+            ValueError: If a sampled loan is invalid or the pool is empty.
+        """
+        try:
+            rng = rng or random.Random()
+            strata: Dict[Hashable, _Stratum] = {}
+            stratum_of = self.stratum
+            for index, loan in enumerate(mortgages):
+                key = stratum_of(loan)
+                stratum = strata.get(key)
+                if stratum is None:
+                    stratum = strata[key] = _Stratum()
+                stratum.indices.append(index)
+            pool_size = len(mortgages)
+            if not pool_size:
+                raise ValueError(ERROR_MSG_APPROXIMATE_RATING)
+
+            target = self.initial_sample
+            while True:
+                for stratum in strata.values():
+                    # Proportional allocation; two loans per stratum at least, so that its variance is estimated
+                    wanted = max(2, math.ceil(target * len(stratum.indices) / pool_size))
+                    for index in stratum.draw(wanted - stratum.drawn, rng):
+                        mortgage = mortgages[index] if prepare is None else prepare(index, mortgages[index])
+                        stratum.add(self.service.calculate_risk_score(mortgage), mortgage.credit_score)
+                estimate = self._estimate(strata.values(), pool_size, confidence)
+                if estimate.probabilities[estimate.rating] >= confidence or estimate.sampled == pool_size:
+                    return estimate
+                target *= APPROXIMATE_SAMPLE_GROWTH
+        except ValueError:
+            raise
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_APPROXIMATE_RATING}: {e}")
+            raise ValueError(ERROR_MSG_APPROXIMATE_RATING) from e
+
+    def _estimate(self, strata, pool_size: int, confidence: float) -> RatingEstimate:
+        total = credit_score_sum = var_total = var_average = covariance = 0.0
+        sampled = 0
+        for stratum in strata:
+            size = len(stratum.indices)
+            factor, stratum_total, stratum_credit_sum, var_y, var_c, cov = stratum.moments()
+            total += stratum_total
+            credit_score_sum += stratum_credit_sum
+            var_total += size * size * factor * var_y
+            var_average += size * size * factor * var_c
+            covariance += size * size * factor * cov
+            sampled += stratum.drawn
+        # Same division as `CreditRatingService.rating_from_totals`, so a pool sampled in full is rated exactly
+        average = credit_score_sum / pool_size
+        var_average /= pool_size * pool_size
+        covariance /= pool_size
+
+        probabilities = self._rating_probabilities(total, var_total, average, var_average, covariance)
+        rating = max(RATINGS_BEST_FIRST, key=probabilities.__getitem__)
+        z = _STANDARD_NORMAL.inv_cdf((1 + confidence) / 2)
+
+        def interval(value: float, variance: float) -> Interval:
+            margin = z * math.sqrt(max(variance, 0.0))
+            return Interval(value, value - margin, value + margin)
+
+        return RatingEstimate(rating, probabilities, sampled, pool_size, interval(total, var_total),
+                              interval(average, var_average))
+
+    def _rating_probabilities(self, total: float, var_total: float, average: float, var_average: float,
+                              covariance: float) -> Dict[str, float]:
+        rules = self.service.rules
+        if var_average > 0:
+            sd_average = math.sqrt(var_average)
+            points = [(average + z * sd_average, weight) for z, weight in _GRID]
+            slope = covariance / var_average
+        else:
+            points, slope = [(average, 1.0)], 0.0
+        # Spread of the total left once the average credit score is known
+        sd_total = math.sqrt(max(var_total - slope * covariance, 0.0))
+
+        def at_most(score: int, mean: float) -> float:
+            # Totals are whole numbers, hence the continuity correction
+            if sd_total == 0:
+                return 1.0 if mean <= score + 0.5 else 0.0
+            return _STANDARD_NORMAL.cdf((score + 0.5 - mean) / sd_total)
+
+        probabilities = dict.fromkeys(RATINGS_BEST_FIRST, 0.0)
+        for point, weight in points:
+            mean = total + slope * (point - average) + self.service.average_credit_adjustment(point)
+            aaa, bbb = at_most(rules.rating_score_aaa, mean), at_most(rules.rating_score_bbb, mean)
+            probabilities[RATING_AAA] += weight * aaa
+            probabilities[RATING_BBB] += weight * (bbb - aaa)
+            probabilities[RATING_C] += weight * (1 - bbb)
+        return probabilities
@@ -1,20 +1,43 @@
 from abc import ABC, abstractmethod
 from utils.decorators import log_method
 from configs.constants import (
-    LTV_HIGH_THRESHOLD, LTV_MEDIUM_THRESHOLD, LTV_HIGH_SCORE, LTV_MEDIUM_SCORE, LTV_LOW_SCORE,
-    DTI_HIGH_THRESHOLD, DTI_MEDIUM_THRESHOLD, DTI_HIGH_SCORE, DTI_MEDIUM_SCORE, DTI_LOW_SCORE,
-    CREDIT_SCORE_GOOD, CREDIT_SCORE_POOR, CREDIT_SCORE_GOOD_DEDUCTION, CREDIT_SCORE_POOR_ADDITION, CREDIT_SCORE_NEUTRAL,
-    LOAN_TYPE_FIXED, LOAN_TYPE_ADJUSTABLE, LOAN_TYPE_FIXED_SCORE, LOAN_TYPE_ADJUSTABLE_SCORE,
-    PROPERTY_TYPE_SINGLE_FAMILY, PROPERTY_TYPE_CONDO, PROPERTY_TYPE_SINGLE_FAMILY_SCORE, PROPERTY_TYPE_CONDO_SCORE,
-    RATING_SCORE_AAA, RATING_SCORE_BBB, RATING_AAA, RATING_BBB, RATING_C,
+    LOAN_TYPE_FIXED, LOAN_TYPE_ADJUSTABLE, PROPERTY_TYPE_SINGLE_FAMILY, PROPERTY_TYPE_CONDO,
+    CREDIT_SCORE_MIN, CREDIT_SCORE_MAX,
+    RATING_AAA, RATING_BBB, RATING_C,
     ERROR_MSG_LTV, ERROR_MSG_DTI, ERROR_MSG_CREDIT_SCORE, ERROR_MSG_LOAN_TYPE, ERROR_MSG_PROPERTY_TYPE,
-    ERROR_MSG_TOTAL_RISK, ERROR_MSG_CREDIT_RATING
+    ERROR_MSG_TOTAL_RISK, ERROR_MSG_CREDIT_RATING, ERROR_MSG_PORTFOLIO_RATING,
+    TRACE_SCORE_CHUNK_SIZE, SPAN_SCORE_CHUNK, STREAM_CHUNK_SIZE
 )
-from typing import List
+from configs.rules import ScoringRules, get_scoring_rules
+from domain.scoring_engines import ScoringEngine, scoring_engines
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from utils.exceptions import JobCancelledError
 from utils.logger import project_logger
+from utils.tracing import current_span, span
+
+try:
+    import pyarrow.compute as pc
+except ImportError:  # Only needed for pools sent as Arrow columns, see schemas.arrow
+    pc = None
+
+
+class PoolTotals(NamedTuple):
+    """The pool-level totals a rating is derived from, see `CreditRatingService.rating_from_totals`."""
+    total_score: int
+    credit_score_sum: float
+    loan_count: int
 
 
 class RiskScoreCalculator(ABC):
+    def __init__(self, rules: Optional[ScoringRules] = None):
+        """
+        Initialize the calculator with the scoring rules to apply.
+
+        Args:
+            rules (ScoringRules, optional): Rules to score with. Defaults to the currently active rules.
+        """
+        self.rules = rules or get_scoring_rules()
+
     @abstractmethod
     def calculate(self, mortgage) -> int:
         """
@@ -42,12 +65,13 @@ class LoanToValueRisk(RiskScoreCalculator):
             int: The calculated LTV risk score.
         """
         try:
+            rules = self.rules
             ltv = mortgage.loan_amount / mortgage.property_value
-            if ltv > LTV_HIGH_THRESHOLD:
-                return LTV_HIGH_SCORE
-            elif ltv > LTV_MEDIUM_THRESHOLD:
-                return LTV_MEDIUM_SCORE
-            return LTV_LOW_SCORE
+            if ltv > rules.ltv_high_threshold:
+                return rules.ltv_high_score
+            elif ltv > rules.ltv_medium_threshold:
+                return rules.ltv_medium_score
+            return rules.ltv_low_score
         except Exception as e:
             project_logger.error(f"{ERROR_MSG_LTV}: {e}")
             raise ValueError(ERROR_MSG_LTV) from e
@@ -66,12 +90,13 @@ class DebtToIncomeRisk(RiskScoreCalculator):
             int: The calculated DTI risk score.
         """
         try:
+            rules = self.rules
             dti = (mortgage.debt_amount / mortgage.annual_income) * 100
-            if dti > DTI_HIGH_THRESHOLD:
-                return DTI_HIGH_SCORE
-            elif dti > DTI_MEDIUM_THRESHOLD:
-                return DTI_MEDIUM_SCORE
-            return DTI_LOW_SCORE
+            if dti > rules.dti_high_threshold:
+                return rules.dti_high_score
+            elif dti > rules.dti_medium_threshold:
+                return rules.dti_medium_score
+            return rules.dti_low_score
         except Exception as e:
             project_logger.error(f"{ERROR_MSG_DTI}: {e}")
             raise ValueError(ERROR_MSG_DTI) from e
@@ -89,11 +114,12 @@ class CreditScoreRisk(RiskScoreCalculator):
             int: The calculated Credit Score risk score.
         """
         try:
-            if mortgage.credit_score >= CREDIT_SCORE_GOOD:
-                return CREDIT_SCORE_GOOD_DEDUCTION
-            elif mortgage.credit_score < CREDIT_SCORE_POOR:
-                return CREDIT_SCORE_POOR_ADDITION
-            return CREDIT_SCORE_NEUTRAL
+            rules = self.rules
+            if mortgage.credit_score >= rules.credit_score_good:
+                return rules.credit_score_good_score
+            elif mortgage.credit_score < rules.credit_score_poor:
+                return rules.credit_score_poor_score
+            return rules.credit_score_neutral_score
         except Exception as e:
             project_logger.error(f"{ERROR_MSG_CREDIT_SCORE}: {e}")
             raise ValueError(ERROR_MSG_CREDIT_SCORE) from e
@@ -112,9 +138,9 @@ class LoanTypeRisk(RiskScoreCalculator):
         """
         try:
             if mortgage.loan_type == LOAN_TYPE_FIXED:
-                return LOAN_TYPE_FIXED_SCORE
+                return self.rules.loan_type_fixed_score
             elif mortgage.loan_type == LOAN_TYPE_ADJUSTABLE:
-                return LOAN_TYPE_ADJUSTABLE_SCORE
+                return self.rules.loan_type_adjustable_score
             return 0  # Fallback for unexpected loan types
         except Exception as e:
             project_logger.error(f"{ERROR_MSG_LOAN_TYPE}: {e}")
@@ -134,9 +160,9 @@ class PropertyTypeRisk(RiskScoreCalculator):
         """
         try:
             if mortgage.property_type == PROPERTY_TYPE_CONDO:
-                return PROPERTY_TYPE_CONDO_SCORE
+                return self.rules.property_type_condo_score
             elif mortgage.property_type == PROPERTY_TYPE_SINGLE_FAMILY:
-                return PROPERTY_TYPE_SINGLE_FAMILY_SCORE
+                return self.rules.property_type_single_family_score
             return 0  # Fallback for unexpected property types
         except Exception as e:
             project_logger.error(f"{ERROR_MSG_PROPERTY_TYPE}: {e}")
@@ -144,18 +170,31 @@ class PropertyTypeRisk(RiskScoreCalculator):
 
 
 class CreditRatingService:
-    def __init__(self):
+    def __init__(self, rules: Optional[ScoringRules] = None, engine: Optional[ScoringEngine] = None):
         """
         Initialize the CreditRatingService with a list of risk calculators.
+
+        Args:
+            rules (ScoringRules, optional): Rules shared by all calculators. Defaults to the currently active
+                rules, captured once so a reload mid-calculation cannot mix rule versions.
+            engine (ScoringEngine, optional): Engine to score whole pools with. Defaults to the fastest engine for
+                each pool's size, see `domain.scoring_engines`.
         """
+        self.rules = rules or get_scoring_rules()
+        self.engine = engine
         self.risk_calculators: List[RiskScoreCalculator] = [
-            LoanToValueRisk(),
-            DebtToIncomeRisk(),
-            CreditScoreRisk(),
-            LoanTypeRisk(),
-            PropertyTypeRisk()
+            LoanToValueRisk(self.rules),
+            DebtToIncomeRisk(self.rules),
+            CreditScoreRisk(self.rules),
+            LoanTypeRisk(self.rules),
+            PropertyTypeRisk(self.rules)
         ]
 
+    @property
+    def rule_version(self) -> str:
+        """The version of the scoring rules used by this service."""
+        return self.rules.version
+
     def calculate_risk_score(self, mortgage) -> int:
         """
         Calculate the total risk score for a mortgage based on all risk calculators.
@@ -172,30 +211,290 @@ class CreditRatingService:
             project_logger.error(f"{ERROR_MSG_TOTAL_RISK}: {e}")
             raise ValueError(ERROR_MSG_TOTAL_RISK) from e
 
-    def calculate_credit_rating(self, mortgages: List) -> str:
+    def calculate_credit_rating(self, mortgages: List,
+                                progress_callback: Optional[Callable[[int], None]] = None) -> str:
         """
         Calculate the overall credit rating based on the risk score of multiple mortgages.
 
         Args:
             mortgages (List[Mortgage]): A list of mortgage objects to calculate the credit rating.
+            progress_callback (Callable[[int], None], optional): Called with the number of loans scored so far
+                every `PROGRESS_REPORT_INTERVAL` loans. It may raise `JobCancelledError` to abort the calculation.
 
         Returns:
             str: The calculated credit rating based on the total risk score.
         """
         try:
-            total_score = sum(self.calculate_risk_score(m) for m in mortgages)
-
-            avg_credit_score = sum(m.credit_score for m in mortgages) / len(mortgages)
-            if avg_credit_score >= CREDIT_SCORE_GOOD:
-                total_score -= 1
-            elif avg_credit_score < CREDIT_SCORE_POOR:
-                total_score += 1
-
-            if total_score <= RATING_SCORE_AAA:
-                return RATING_AAA
-            elif total_score <= RATING_SCORE_BBB:
-                return RATING_BBB
-            return RATING_C
+            return self.rating_from_totals(*self.calculate_pool_totals(mortgages, progress_callback))
+        except JobCancelledError:
+            raise
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_CREDIT_RATING}: {e}")
+            raise ValueError(ERROR_MSG_CREDIT_RATING) from e
+
+    def calculate_pool_totals(self, mortgages: List,
+                              progress_callback: Optional[Callable[[int], None]] = None) -> PoolTotals:
+        """
+        Score every mortgage of a pool and sum up what its rating is derived from.
+
+        The pool is scored by the service's engine or, by default, the engine calibrated as the fastest for its
+        size. Every engine gives the same totals; traced requests are scored calculator by calculator instead, so
+        that each calculator gets a span of its own.
+
+        Args:
+            mortgages (List[Mortgage]): A list of mortgage objects.
+            progress_callback (Callable[[int], None], optional): See `calculate_credit_rating`.
+
+        Returns:
+            PoolTotals: The summed risk scores and credit scores, and the number of mortgages.
+        """
+        if progress_callback is None and current_span() is not None:
+            return PoolTotals(self._calculate_total_traced(mortgages), sum(m.credit_score for m in mortgages),
+                              len(mortgages))
+        engine = self.engine or scoring_engines.select(len(mortgages))
+        try:
+            total_score, credit_score_sum = engine.score(self, mortgages, progress_callback)
+        except (ValueError, JobCancelledError):
+            raise
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_TOTAL_RISK} ({engine.name} engine): {e}")
+            raise ValueError(ERROR_MSG_TOTAL_RISK) from e
+        return PoolTotals(total_score, credit_score_sum, len(mortgages))
+
+    def calculate_risk_score_columns(self, columns) -> Any:
+        """
+        Score a pool held as Arrow columns with vectorized kernels, applying the same rules as the calculators.
+
+        Args:
+            columns (MortgageColumns): The validated columns, see `schemas.arrow.read_mortgage_columns`.
+
+        Returns:
+            pyarrow.ChunkedArray: The risk score of every mortgage.
+        """
+        rules = self.rules
+
+        def tiered(values, high_threshold, high_score, medium_threshold, medium_score, low_score):
+            return pc.if_else(pc.greater(values, high_threshold), high_score,
+                              pc.if_else(pc.greater(values, medium_threshold), medium_score, low_score))
+
+        ltv = pc.divide(columns.loan_amount, columns.property_value)
+        dti = pc.multiply(pc.divide(columns.debt_amount, columns.annual_income), 100)
+        scores = [
+            tiered(ltv, rules.ltv_high_threshold, rules.ltv_high_score,
+                   rules.ltv_medium_threshold, rules.ltv_medium_score, rules.ltv_low_score),
+            tiered(dti, rules.dti_high_threshold, rules.dti_high_score,
+                   rules.dti_medium_threshold, rules.dti_medium_score, rules.dti_low_score),
+            pc.if_else(pc.greater_equal(columns.credit_score, rules.credit_score_good), rules.credit_score_good_score,
+                       pc.if_else(pc.less(columns.credit_score, rules.credit_score_poor),
+                                  rules.credit_score_poor_score, rules.credit_score_neutral_score)),
+            pc.if_else(pc.equal(columns.loan_type, LOAN_TYPE_FIXED),
+                       rules.loan_type_fixed_score, rules.loan_type_adjustable_score),
+            pc.if_else(pc.equal(columns.property_type, PROPERTY_TYPE_CONDO),
+                       rules.property_type_condo_score, rules.property_type_single_family_score),
+        ]
+        total = scores[0]
+        for score in scores[1:]:
+            total = pc.add(total, score)
+        return total
+
+    def calculate_credit_rating_columns(self, columns) -> str:
+        """
+        Calculate the credit rating of a pool held as Arrow columns, see `calculate_risk_score_columns`.
+
+        Args:
+            columns (MortgageColumns): The validated columns.
+
+        Returns:
+            str: The credit rating.
+        """
+        try:
+            return self.rating_from_totals(*self.calculate_pool_totals_columns(columns))
         except Exception as e:
             project_logger.error(f"{ERROR_MSG_CREDIT_RATING}: {e}")
             raise ValueError(ERROR_MSG_CREDIT_RATING) from e
+
+    def calculate_pool_totals_columns(self, columns) -> PoolTotals:
+        """
+        Sum up what the rating of a pool held as Arrow columns is derived from.
+
+        Args:
+            columns (MortgageColumns): The validated columns.
+
+        Returns:
+            PoolTotals: The summed risk scores and credit scores, and the number of mortgages.
+        """
+        return PoolTotals(pc.sum(self.calculate_risk_score_columns(columns)).as_py(),
+                          pc.sum(columns.credit_score).as_py(), len(columns))
+
+    def calculate_credit_rating_early_exit(self, mortgages: List) -> Tuple[str, int]:
+        """
+        Calculate the credit rating, stopping as soon as the remaining mortgages can no longer change it.
+
+        After each mortgage the final score is bounded by assuming every remaining mortgage scores the per-loan
+        minimum (or maximum) and by the range of average credit adjustments the remaining credit scores still
+        allow. Once both bounds map to the same rating the result is settled.
+
+        Args:
+            mortgages (List[Mortgage]): A list of mortgage objects to calculate the credit rating.
+
+        Returns:
+            Tuple[str, int]: The credit rating and the number of mortgages examined.
+        """
+        try:
+            pool_size = len(mortgages)
+            loan_min, loan_max = self.rules.loan_score_bounds()
+            total_score = 0
+            credit_score_sum = 0
+            examined = 0
+            for mortgage in mortgages:
+                total_score += self.calculate_risk_score(mortgage)
+                credit_score_sum += mortgage.credit_score
+                examined += 1
+
+                remaining = pool_size - examined
+                adjustment_min, adjustment_max = self._average_credit_adjustment_bounds(
+                    credit_score_sum, remaining, pool_size)
+                lowest = self.score_to_rating(total_score + remaining * loan_min + adjustment_min)
+                highest = self.score_to_rating(total_score + remaining * loan_max + adjustment_max)
+                if lowest == highest:
+                    return lowest, examined
+            raise ValueError(ERROR_MSG_CREDIT_RATING)
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_CREDIT_RATING}: {e}")
+            raise ValueError(ERROR_MSG_CREDIT_RATING) from e
+
+    def build_score_index(self, loans: Mapping[str, Any]) -> Dict[str, Tuple[int, int]]:
+        """
+        Score every distinct loan exactly once.
+
+        Args:
+            loans (Mapping[str, Mortgage]): The loans by ID.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: The (risk score, credit score) of every loan, by ID.
+        """
+        return {loan_id: (self.calculate_risk_score(loan), loan.credit_score) for loan_id, loan in loans.items()}
+
+    def iter_portfolio_totals(self, loans: Mapping[str, Any],
+                              deals: Mapping[str, Sequence[str]]) -> Iterator[Tuple[str, PoolTotals]]:
+        """
+        Sum up the pool totals of several deals whose pools may share loans, one deal after the other.
+
+        Each distinct loan is scored once into a shared index, when a deal first references it; a deal's totals
+        are then computed from the index alone, so the scoring cost grows with the number of unique loans rather
+        than with the number of times loans are referenced. The first deal's totals are available as soon as its
+        loans are scored, and loans that no deal references are never scored.
+
+        Args:
+            loans (Mapping[str, Mortgage]): The distinct loans of the portfolio, by ID.
+            deals (Mapping[str, Sequence[str]]): The loan IDs of every deal, by deal ID.
+
+        Yields:
+            Tuple[str, PoolTotals]: The deal ID and its totals, in the order of `deals`.
+        """
+        try:
+            index: Dict[str, Tuple[int, int]] = {}
+            for deal_id, loan_ids in deals.items():
+                index.update(self.build_score_index({loan_id: loans[loan_id] for loan_id in loan_ids
+                                                     if loan_id not in index}))
+                total_score = 0
+                credit_score_sum = 0
+                for loan_id in loan_ids:
+                    risk_score, credit_score = index[loan_id]
+                    total_score += risk_score
+                    credit_score_sum += credit_score
+                yield deal_id, PoolTotals(total_score, credit_score_sum, len(loan_ids))
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_PORTFOLIO_RATING}: {e}")
+            raise ValueError(ERROR_MSG_PORTFOLIO_RATING) from e
+
+    def iter_risk_score_chunks(self, mortgages: Sequence,
+                               chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Tuple[int, List[int]]]:
+        """
+        Score a pool chunk by chunk, for results that are sent while the rest of the pool is still being scored.
+
+        Args:
+            mortgages (Sequence[Mortgage]): The pool.
+            chunk_size (int): Mortgages per chunk.
+
+        Yields:
+            Tuple[int, List[int]]: The position of the chunk's first mortgage and the chunk's risk scores.
+        """
+        for first in range(0, len(mortgages), chunk_size):
+            chunk = mortgages[first:first + chunk_size]
+            with span(SPAN_SCORE_CHUNK, first=first, loans=len(chunk)):
+                scores = [self.calculate_risk_score(m) for m in chunk]
+            yield first, scores
+
+    def _average_credit_adjustment_bounds(self, credit_score_sum: int, remaining: int,
+                                          pool_size: int) -> Tuple[int, int]:
+        # Range of the pool's average credit score given the scores seen so far
+        avg_min = (credit_score_sum + remaining * CREDIT_SCORE_MIN) / pool_size
+        avg_max = (credit_score_sum + remaining * CREDIT_SCORE_MAX) / pool_size
+        adjustments = {self.average_credit_adjustment(avg_min), self.average_credit_adjustment(avg_max)}
+        # The adjustment is a step function, so also include the steps the range straddles
+        for threshold in (self.rules.credit_score_poor, self.rules.credit_score_good):
+            if avg_min < threshold <= avg_max:
+                adjustments.add(self.average_credit_adjustment(threshold))
+        return min(adjustments), max(adjustments)
+
+    def _calculate_total_traced(self, mortgages: List) -> int:
+        # Score chunk by chunk and, within a chunk, calculator by calculator, so that each gets a span of its own
+        total_score = 0
+        for first in range(0, len(mortgages), TRACE_SCORE_CHUNK_SIZE):
+            chunk = mortgages[first:first + TRACE_SCORE_CHUNK_SIZE]
+            with span(SPAN_SCORE_CHUNK, first=first, loans=len(chunk)):
+                for calculator in self.risk_calculators:
+                    with span(type(calculator).__name__):
+                        try:
+                            total_score += sum(calculator.calculate(m) for m in chunk)
+                        except Exception as e:
+                            project_logger.error(f"{ERROR_MSG_TOTAL_RISK}: {e}")
+                            raise ValueError(ERROR_MSG_TOTAL_RISK) from e
+        return total_score
+
+    def average_credit_adjustment(self, avg_credit_score: float) -> int:
+        """
+        Pool-level adjustment applied to the total risk score based on the average credit score.
+
+        Args:
+            avg_credit_score (float): The average credit score of the pool.
+
+        Returns:
+            int: The adjustment to add to the total risk score.
+        """
+        if avg_credit_score >= self.rules.credit_score_good:
+            return self.rules.average_credit_good_adjustment
+        elif avg_credit_score < self.rules.credit_score_poor:
+            return self.rules.average_credit_poor_adjustment
+        return 0
+
+    def rating_from_totals(self, total_score: int, credit_score_sum: float, loan_count: int) -> str:
+        """
+        Rate a pool from the sum of its loans' risk scores and credit scores.
+
+        Args:
+            total_score (int): The summed risk scores of the pool's loans.
+            credit_score_sum (float): The summed credit scores of the pool's loans.
+            loan_count (int): The number of loans in the pool.
+
+        Returns:
+            str: The credit rating.
+        """
+        return self.score_to_rating(total_score + self.average_credit_adjustment(credit_score_sum / loan_count))
+
+    def score_to_rating(self, total_score: int) -> str:
+        """
+        Map an adjusted total risk score to a credit rating.
+
+        Args:
+            total_score (int): The total risk score including the average credit adjustment.
+
+        Returns:
+            str: The credit rating.
+        """
+        if total_score <= self.rules.rating_score_aaa:
+            return RATING_AAA
+        elif total_score <= self.rules.rating_score_bbb:
+            return RATING_BBB
+        return RATING_C
@@ -0,0 +1,471 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import Flask
+
+from configs.constants import (
+    LOAN_TYPE_FIXED, LOAN_TYPE_ADJUSTABLE, PROPERTY_TYPE_SINGLE_FAMILY, PROPERTY_TYPE_CONDO, CREDIT_SCORE_MIN,
+    CREDIT_SCORE_MAX, PROGRESS_REPORT_INTERVAL, ENGINE_AUTO, ENGINE_LOOP, ENGINE_FUSED, ENGINE_COLUMNS,
+    ENGINE_PROCESSES, DEFAULT_ENGINE_CROSSOVERS, ENGINE_CALIBRATION_SIZES, ENGINE_CALIBRATION_REPEATS,
+    ENGINE_CALIBRATION_MAX_SECONDS, ENGINE_CALIBRATION_SEED, ENGINE_PROCESS_CHUNK_SIZE, ENGINE_PROCESS_POLL_INTERVAL,
+    CROSSOVERS, TIMINGS, CPU_COUNT, SCORING_ENGINE_CALIBRATION_FILE_KEY, SCORING_ENGINE_CALIBRATE_KEY,
+    DEFAULT_CONFIG_VALUES, ERROR_MSG_UNKNOWN_ENGINE, ERROR_MSG_ENGINE_CALIBRATION, LOG_ENGINES_CALIBRATED,
+)
+from configs.rules import ScoringRules
+from schemas.arrow import MortgageColumns
+from schemas.rmbs import Mortgage
+from utils.concurrency import wait_for
+from utils.logger import project_logger
+
+try:
+    import pyarrow as pa
+except ImportError:  # Only needed by the columns engine
+    pa = None
+
+# (total risk score, credit score sum) of a pool
+Totals = Tuple[int, int]
+
+
+def fused_totals(rules: ScoringRules, mortgages: Sequence) -> Totals:
+    """
+    Score a pool in a single pass, applying the same rules as the risk calculators with the thresholds and scores
+    unpacked once rather than looked up for every loan and calculator.
+
+    Args:
+        rules (ScoringRules): The scoring rules to apply.
+        mortgages (Sequence[Mortgage]): The pool.
+
+    Returns:
+        Totals: The summed risk scores and credit scores.
+    """
+    ltv_high, ltv_medium = rules.ltv_high_threshold, rules.ltv_medium_threshold
+    ltv_high_score, ltv_medium_score, ltv_low_score = rules.ltv_high_score, rules.ltv_medium_score, rules.ltv_low_score
+    dti_high, dti_medium = rules.dti_high_threshold, rules.dti_medium_threshold
+    dti_high_score, dti_medium_score, dti_low_score = rules.dti_high_score, rules.dti_medium_score, rules.dti_low_score
+    credit_good, credit_poor = rules.credit_score_good, rules.credit_score_poor
+    credit_good_score, credit_poor_score = rules.credit_score_good_score, rules.credit_score_poor_score
+    credit_neutral_score = rules.credit_score_neutral_score
+    # Unexpected types score 0, as in LoanTypeRisk and PropertyTypeRisk
+    loan_type_scores = {LOAN_TYPE_FIXED: rules.loan_type_fixed_score,
+                        LOAN_TYPE_ADJUSTABLE: rules.loan_type_adjustable_score}.get
+    property_type_scores = {PROPERTY_TYPE_CONDO: rules.property_type_condo_score,
+                            PROPERTY_TYPE_SINGLE_FAMILY: rules.property_type_single_family_score}.get
+
+    total_score = credit_score_sum = 0
+    for mortgage in mortgages:
+        # Same expressions as the calculators, so that floating point rounding cannot tell the engines apart
+        ltv = mortgage.loan_amount / mortgage.property_value
+        dti = (mortgage.debt_amount / mortgage.annual_income) * 100
+        credit_score = mortgage.credit_score
+        total_score += (
+            (ltv_high_score if ltv > ltv_high else ltv_medium_score if ltv > ltv_medium else ltv_low_score)
+            + (dti_high_score if dti > dti_high else dti_medium_score if dti > dti_medium else dti_low_score)
+            + (credit_good_score if credit_score >= credit_good
+               else credit_poor_score if credit_score < credit_poor else credit_neutral_score)
+            + loan_type_scores(mortgage.loan_type, 0)
+            + property_type_scores(mortgage.property_type, 0)
+        )
+        credit_score_sum += credit_score
+    return total_score, credit_score_sum
+
+
+class ScoringEngine(ABC):
+    """A strategy for scoring a whole pool; every engine must give exactly the totals of the risk calculators."""
+    name: str
+
+    def available(self) -> bool:
+        """Whether the engine can run in this environment."""
+        return True
+
+    def close(self) -> None:
+        """Release what the engine started, e.g. worker processes; it starts them again on next use."""
+
+    def after_fork(self) -> None:
+        """Forget what did not survive a fork of the process, in the forked process."""
+
+    @abstractmethod
+    def score(self, service: Any, mortgages: Sequence,
+              progress_callback: Optional[Callable[[int], None]] = None) -> Totals:
+        """
+        Score a pool.
+
+        Args:
+            service (CreditRatingService): The service rating the pool, holding its rules and calculators.
+            mortgages (Sequence[Mortgage]): The validated mortgages.
+            progress_callback (Callable[[int], None], optional): Called with the number of loans scored so far,
+                see `CreditRatingService.calculate_credit_rating`; it may raise to abort.
+
+        Returns:
+            Totals: The summed risk scores and credit scores.
+        """
+        pass
+
+
+class LoopEngine(ScoringEngine):
+    """Every risk calculator for every loan; cheapest to start, so it suits the smallest pools."""
+    name = ENGINE_LOOP
+
+    def score(self, service, mortgages, progress_callback=None):
+        total_score = 0
+        for index, mortgage in enumerate(mortgages, 1):
+            total_score += service.calculate_risk_score(mortgage)
+            if progress_callback is not None and index % PROGRESS_REPORT_INTERVAL == 0:
+                progress_callback(index)
+        if progress_callback is not None:
+            progress_callback(len(mortgages))
+        return total_score, sum(m.credit_score for m in mortgages)
+
+
+class FusedEngine(ScoringEngine):
+    """All risk components in a single pass over the pool, see `fused_totals`."""
+    name = ENGINE_FUSED
+
+    def score(self, service, mortgages, progress_callback=None):
+        if progress_callback is None:
+            return fused_totals(service.rules, mortgages)
+        total_score = credit_score_sum = 0
+        for first in range(0, len(mortgages), PROGRESS_REPORT_INTERVAL):
+            chunk_score, chunk_credit_sum = fused_totals(service.rules,
+                                                         mortgages[first:first + PROGRESS_REPORT_INTERVAL])
+            total_score += chunk_score
+            credit_score_sum += chunk_credit_sum
+            progress_callback(min(first + PROGRESS_REPORT_INTERVAL, len(mortgages)))
+        if not mortgages:
+            progress_callback(0)
+        return total_score, credit_score_sum
+
+
+class ColumnsEngine(ScoringEngine):
+    """
+    The pool converted to Arrow columns and scored with the vectorized kernels of
+    `CreditRatingService.calculate_risk_score_columns`. The conversion costs about as much as scoring a loan the
+    fused way; what is left of the scoring is done in native code.
+    """
+    name = ENGINE_COLUMNS
+
+    def available(self):
+        return pa is not None
+
+    def score(self, service, mortgages, progress_callback=None):
+        columns = MortgageColumns(*(pa.chunked_array([pa.array([getattr(m, field) for m in mortgages])])
+                                    for field in MortgageColumns._fields))
+        totals = service.calculate_pool_totals_columns(columns) if mortgages else None
+        if progress_callback is not None:
+            progress_callback(len(mortgages))
+        return (totals.total_score, totals.credit_score_sum) if totals else (0, 0)
+
+
+class ProcessesEngine(ScoringEngine):
+    """
+    Chunks of `ENGINE_PROCESS_CHUNK_SIZE` loans scored the fused way in a pool of worker processes, one per CPU,
+    started on first use. The mortgages are pickled to the workers, which only pays off for large pools on
+    machines with several CPUs.
+
+    Results are awaited with `utils.concurrency.wait_for`, so a greenlet scoring a pool does not stall the other
+    requests served by the hub.
+    """
+    name = ENGINE_PROCESSES
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def after_fork(self):
+        # The management thread of an inherited executor did not survive the fork, so its tasks would never
+        # complete. It is dropped rather than shut down, which would wait for that thread; this process starts an
+        # executor of its own on first use
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @staticmethod
+    def _result(future: Future) -> Totals:
+        # Set from the executor's management thread, so it is always a thread event
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        wait_for(done, None, ENGINE_PROCESS_POLL_INTERVAL)
+        return future.result()
+
+    def score(self, service, mortgages, progress_callback=None):
+        executor = self._get_executor()
+        futures = [executor.submit(fused_totals, service.rules, mortgages[first:first + ENGINE_PROCESS_CHUNK_SIZE])
+                   for first in range(0, len(mortgages), ENGINE_PROCESS_CHUNK_SIZE)]
+        total_score = credit_score_sum = scored = 0
+        try:
+            for first, future in zip(range(0, len(mortgages), ENGINE_PROCESS_CHUNK_SIZE), futures):
+                chunk_score, chunk_credit_sum = self._result(future)
+                total_score += chunk_score
+                credit_score_sum += chunk_credit_sum
+                scored = min(first + ENGINE_PROCESS_CHUNK_SIZE, len(mortgages))
+                if progress_callback is not None:
+                    progress_callback(scored)
+        finally:
+            for future in futures:
+                future.cancel()
+        if progress_callback is not None and not mortgages:
+            progress_callback(0)
+        return total_score, credit_score_sum
+
+
+def calibration_pool(size: int, seed: int = ENGINE_CALIBRATION_SEED) -> List[Mortgage]:
+    """
+    A random pool of valid mortgages spread across every rule threshold, to benchmark the engines with.
+
+    Args:
+        size (int): The number of mortgages.
+        seed (int): Seeds the pool.
+
+    Returns:
+        List[Mortgage]: The pool.
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(size):
+        property_value = rng.uniform(80_000, 1_500_000)
+        annual_income = rng.uniform(25_000, 400_000)
+        pool.append(Mortgage(
+            credit_score=rng.randint(CREDIT_SCORE_MIN, CREDIT_SCORE_MAX),
+            loan_amount=property_value * rng.uniform(0.3, 1.0),
+            property_value=property_value,
+            annual_income=annual_income,
+            debt_amount=annual_income * rng.uniform(0.05, 0.7),
+            loan_type=rng.choice([LOAN_TYPE_FIXED, LOAN_TYPE_ADJUSTABLE]),
+            property_type=rng.choice([PROPERTY_TYPE_SINGLE_FAMILY, PROPERTY_TYPE_CONDO]),
+        ))
+    return pool
+
+
+class ScoringEngineRegistry:
+    """
+    The scoring engines and the pool sizes at which each of them is the fastest.
+
+    Crossovers are (smallest pool, engine) pairs in increasing order: a pool is scored by the engine of the last
+    crossover it reaches. They default to `DEFAULT_ENGINE_CROSSOVERS` and are measured by `calibrate`, at startup
+    or offline with `tools/calibrate_engines.py`, whose results are loaded from `SCORING_ENGINE_CALIBRATION_FILE`.
+    """
+
+    def __init__(self):
+        self._engines: Dict[str, ScoringEngine] = {}
+        self.crossovers: List[Tuple[int, str]] = list(DEFAULT_ENGINE_CROSSOVERS)
+
+    def register(self, engine: ScoringEngine) -> None:
+        """
+        Add an engine, replacing any engine of the same name.
+
+        Args:
+            engine (ScoringEngine): The engine.
+        """
+        self._engines[engine.name] = engine
+
+    def names(self) -> List[str]:
+        """The names of the engines available in this environment."""
+        return [name for name, engine in self._engines.items() if engine.available()]
+
+    def get(self, name: str) -> ScoringEngine:
+        """
+        Find an engine by name.
+
+        Args:
+            name (str): The engine name.
+
+        Returns:
+            ScoringEngine: The engine.
+
+        Raises:
+            ValueError: If there is no such engine or it cannot run in this environment.
+        """
+        engine = self._engines.get(name)
+        if engine is None or not engine.available():
+            raise ValueError(f"{ERROR_MSG_UNKNOWN_ENGINE}: {name!r}, expected {ENGINE_AUTO} or one of {self.names()}")
+        return engine
+
+    def resolve(self, name: Optional[str]) -> Optional[ScoringEngine]:
+        """
+        The engine asked for by name, e.g. in a request header.
+
+        Args:
+            name (str, optional): The engine name; empty, None or `auto` to select by pool size.
+
+        Returns:
+            Optional[ScoringEngine]: The engine, or None to select it by pool size.
+
+        Raises:
+            ValueError: If there is no such engine or it cannot run in this environment.
+        """
+        name = (name or "").strip().lower()
+        return None if name in ("", ENGINE_AUTO) else self.get(name)
+
+    def select(self, loan_count: int) -> ScoringEngine:
+        """
+        The fastest engine for a pool, according to the crossovers.
+
+        Args:
+            loan_count (int): The size of the pool.
+
+        Returns:
+            ScoringEngine: The engine.
+        """
+        selected = self.crossovers[0][1]
+        for smallest, name in self.crossovers:
+            if loan_count < smallest:
+                break
+            selected = name
+        return self._engines[selected]
+
+    def set_crossovers(self, crossovers: Sequence[Sequence[Any]]) -> None:
+        """
+        Replace the crossovers, dropping engines that are not available here.
+
+        Args:
+            crossovers (Sequence[Sequence[Any]]): (smallest pool, engine name) pairs.
+        """
+        available = set(self.names())
+        kept: List[Tuple[int, str]] = []
+        for smallest, name in sorted((int(smallest), str(name)) for smallest, name in crossovers):
+            if name in available and (not kept or kept[-1][1] != name):
+                kept.append((smallest, name))
+        if not kept:
+            raise ValueError(f"{ERROR_MSG_ENGINE_CALIBRATION}: no available engine in {crossovers}")
+        # The smallest pools go to the first engine left
+        self.crossovers = [(0, kept[0][1])] + kept[1:]
+
+    def calibrate(self, service: Any, sizes: Sequence[int] = ENGINE_CALIBRATION_SIZES,
+                  repeats: int = ENGINE_CALIBRATION_REPEATS) -> Dict[str, Dict[int, float]]:
+        """
+        Time every available engine on random pools of increasing size and set the crossovers where the fastest
+        engine changes, at the geometric mean of the two sizes. An engine whose time, scaled linearly, would exceed
+        `ENGINE_CALIBRATION_MAX_SECONDS` at the next size is not measured there, unless it was the fastest.
+
+        Args:
+            service (CreditRatingService): The service to score with.
+            sizes (Sequence[int]): The pool sizes to measure, in increasing order.
+            repeats (int): Runs per engine and size; the fastest is kept.
+
+        Returns:
+            Dict[str, Dict[int, float]]: Seconds per engine and pool size.
+        """
+        sizes = sorted(sizes)
+        pool = calibration_pool(sizes[-1])
+        timings: Dict[str, Dict[int, float]] = {name: {} for name in self.names()}
+        candidates = list(timings)
+        winners: List[Tuple[int, str]] = []
+        for position, size in enumerate(sizes):
+            mortgages = pool[:size]
+            for name in candidates:
+                engine = self._engines[name]
+                engine.score(service, mortgages[:1])  # Warm up, e.g. start the worker processes
+                best = math.inf
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    engine.score(service, mortgages)
+                    best = min(best, time.perf_counter() - started)
+                timings[name][size] = best
+            fastest = min(candidates, key=lambda candidate: timings[candidate][size])
+            winners.append((size, fastest))
+            if position + 1 < len(sizes):
+                growth = sizes[position + 1] / size
+                candidates = [name for name in candidates if name == fastest
+                              or timings[name][size] * growth <= ENGINE_CALIBRATION_MAX_SECONDS]
+
+        crossovers = [(0, winners[0][1])]
+        for (previous_size, _), (size, name) in zip(winners, winners[1:]):
+            if name != crossovers[-1][1]:
+                crossovers.append((math.isqrt(previous_size * size), name))
+        self.set_crossovers(crossovers)
+        project_logger.info(f"{LOG_ENGINES_CALIBRATED}: {self.crossovers}")
+        return timings
+
+    def save(self, path: str, timings: Optional[Dict[str, Dict[int, float]]] = None) -> None:
+        """
+        Write the crossovers, and the timings they were derived from, to a calibration file.
+
+        Args:
+            path (str): The file to write.
+            timings (Dict[str, Dict[int, float]], optional): The timings returned by `calibrate`.
+        """
+        with open(path, "w") as calibration_file:
+            json.dump({CROSSOVERS: self.crossovers, TIMINGS: timings or {}, CPU_COUNT: os.cpu_count()},
+                      calibration_file, indent=2)
+
+    def load(self, path: str) -> None:
+        """
+        Read the crossovers from a calibration file written by `save`.
+
+        Args:
+            path (str): The file to read.
+
+        Raises:
+            ValueError: If the file cannot be read or holds no usable crossovers.
+        """
+        try:
+            with open(path) as calibration_file:
+                crossovers = json.load(calibration_file)[CROSSOVERS]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"{ERROR_MSG_ENGINE_CALIBRATION}: {e}") from e
+        self.set_crossovers(crossovers)
+        project_logger.info(f"{LOG_ENGINES_CALIBRATED}: {self.crossovers}")
+
+    def close(self) -> None:
+        """Release what the engines started, see `ScoringEngine.close`."""
+        for engine in self._engines.values():
+            engine.close()
+
+    def after_fork(self, worker: int) -> None:
+        """
+        Let every engine forget what did not survive the fork of a worker process, see `ScoringEngine.after_fork`.
+
+        Args:
+            worker (int): The index of the worker process.
+        """
+        for engine in self._engines.values():
+            engine.after_fork()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Load the calibration file, or calibrate the engines first when `SCORING_ENGINE_CALIBRATE` is set.
+
+        Args:
+            app (Flask): The Flask application.
+        """
+        def setting(key: str) -> Any:
+            return app.config.get(key, DEFAULT_CONFIG_VALUES[key])
+
+        path = setting(SCORING_ENGINE_CALIBRATION_FILE_KEY)
+        try:
+            if setting(SCORING_ENGINE_CALIBRATE_KEY):
+                from domain.credit_rating import CreditRatingService  # That module scores through this one
+                try:
+                    timings = self.calibrate(CreditRatingService())
+                finally:
+                    # Worker processes started to calibrate would otherwise idle in the process that forks the
+                    # service's workers
+                    self.close()
+                if path:
+                    self.save(path, timings)
+            elif path:
+                self.load(path)
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_ENGINE_CALIBRATION}: {e}. Keeping crossovers {self.crossovers}")
+
+
+scoring_engines = ScoringEngineRegistry()
+for _engine in (LoopEngine(), FusedEngine(), ColumnsEngine(), ProcessesEngine()):
+    scoring_engines.register(_engine)
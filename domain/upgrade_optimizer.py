@@ -0,0 +1,146 @@
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from configs.constants import (
+    RATINGS_BEST_FIRST, OBJECTIVE_COUNT, OBJECTIVE_PRINCIPAL, ERROR_MSG_UPGRADE_PLAN,
+)
+from domain.credit_rating import CreditRatingService
+from utils.logger import project_logger
+
+
+class UpgradePlan(NamedTuple):
+    """Loans to remove from a pool so that it reaches a target rating."""
+    current: str  # Rating of the pool as submitted
+    achievable: bool
+    rating: str  # Rating of the pool once the loans are removed (the current rating if not achievable)
+    removed: List[int]  # Positions of the removed loans in the original pool, ascending
+    removed_principal: float
+
+
+def meets_target(rating: str, target: str) -> bool:
+    """
+    Whether a rating is at least as good as the target rating.
+
+    Args:
+        rating (str): The rating to check.
+        target (str): The target rating.
+
+    Returns:
+        bool: True if `rating` ranks at or above `target`.
+    """
+    return RATINGS_BEST_FIRST.index(rating) <= RATINGS_BEST_FIRST.index(target)
+
+
+class UpgradeOptimizer:
+    """
+    Finds a small set of loans whose removal moves a pool to a target rating.
+
+    Every loan is scored once. Candidate removal orders are then built by sorting the per-loan scores: highest risk
+    score first (the largest reductions of the total), lowest credit score first (the largest increases of the
+    average credit score, which can unlock the good-credit adjustment or drop the poor-credit one) and, when
+    minimizing principal, highest risk score per unit of principal first. Each order is scanned once, keeping the
+    running risk and credit score sums, and the first prefix whose exact rating - average credit adjustment
+    included - meets the target is a candidate. Loans of the candidate that are not needed are then put back, and
+    the best candidate wins. The whole search is O(n log n).
+
+    Without the average credit adjustment, the highest-risk-first prefix is the smallest possible removal set.
+    With it, the result always reaches the target and no single removed loan can be put back, but it is not
+    guaranteed to be the global optimum, which would take a two-constraint knapsack search.
+    """
+
+    def __init__(self, service: Optional[CreditRatingService] = None):
+        """
+        Initialize the optimizer.
+
+        Args:
+            service (CreditRatingService, optional): Service to score and rate with. Defaults to one using the
+                currently active rules.
+        """
+        self.service = service or CreditRatingService()
+
+    def optimize(self, mortgages: Sequence, target: str, objective: str = OBJECTIVE_COUNT) -> UpgradePlan:
+        """
+        Find the loans to remove from a pool so that it is rated `target` or better.
+
+        Args:
+            mortgages (Sequence[Mortgage]): The pool.
+            target (str): The rating to reach.
+            objective (str): `OBJECTIVE_COUNT` to remove as few loans as possible, `OBJECTIVE_PRINCIPAL` to
+                remove as little principal as possible.
+
+        Returns:
+            UpgradePlan: The loans to remove; at least one loan is always kept.
+        """
+        try:
+            risks = [self.service.calculate_risk_score(m) for m in mortgages]
+            credits = [m.credit_score for m in mortgages]
+            principals = [m.loan_amount for m in mortgages]
+            total_score, credit_score_sum, pool_size = sum(risks), sum(credits), len(mortgages)
+
+            current = self.service.rating_from_totals(total_score, credit_score_sum, pool_size)
+            if meets_target(current, target):
+                return UpgradePlan(current, True, current, [], 0.0)
+
+            def rating_without(removed: Sequence[int]) -> str:
+                return self.service.rating_from_totals(total_score - sum(risks[i] for i in removed),
+                                                       credit_score_sum - sum(credits[i] for i in removed),
+                                                       pool_size - len(removed))
+
+            def cost(removed: Sequence[int]) -> Tuple[float, float]:
+                principal = sum(principals[i] for i in removed)
+                return (len(removed), principal) if objective == OBJECTIVE_COUNT else (principal, len(removed))
+
+            orders: List[Callable[[int], Tuple]] = [
+                lambda i: (-risks[i], credits[i], principals[i]),
+                lambda i: (credits[i], -risks[i], principals[i]),
+            ]
+            if objective == OBJECTIVE_PRINCIPAL:
+                orders.append(lambda i: (-risks[i] / principals[i], credits[i]))
+
+            best: Optional[List[int]] = None
+            for key in orders:
+                candidate = self._first_prefix_meeting_target(
+                    sorted(range(pool_size), key=key), risks, credits, total_score, credit_score_sum, target)
+                if candidate is None:
+                    continue
+                candidate = self._put_back_unneeded(candidate, risks, credits, principals, total_score,
+                                                    credit_score_sum, pool_size, target)
+                if best is None or cost(candidate) < cost(best):
+                    best = candidate
+
+            if best is None:
+                return UpgradePlan(current, False, current, [], 0.0)
+            best.sort()
+            return UpgradePlan(current, True, rating_without(best), best, float(sum(principals[i] for i in best)))
+        except Exception as e:
+            project_logger.error(f"{ERROR_MSG_UPGRADE_PLAN}: {e}")
+            raise ValueError(ERROR_MSG_UPGRADE_PLAN) from e
+
+    def _first_prefix_meeting_target(self, order: List[int], risks: List[int], credits: List[int],
+                                     total_score: int, credit_score_sum: int, target: str) -> Optional[List[int]]:
+        remaining = len(order)
+        # The last loan is never removed: an empty pool has no rating
+        for count, index in enumerate(order[:-1], 1):
+            total_score -= risks[index]
+            credit_score_sum -= credits[index]
+            remaining -= 1
+            if meets_target(self.service.rating_from_totals(total_score, credit_score_sum, remaining), target):
+                return order[:count]
+        return None
+
+    def _put_back_unneeded(self, removed: List[int], risks: List[int], credits: List[int], principals: List[float],
+                           total_score: int, credit_score_sum: int, pool_size: int, target: str) -> List[int]:
+        total_score -= sum(risks[i] for i in removed)
+        credit_score_sum -= sum(credits[i] for i in removed)
+        remaining = pool_size - len(removed)
+        still_removed: List[int] = []
+        # Try the most expensive loans first, so that whatever has to stay removed is as cheap as possible
+        for index in sorted(removed, key=lambda i: principals[i], reverse=True):
+            rating = self.service.rating_from_totals(total_score + risks[index], credit_score_sum + credits[index],
+                                                     remaining + 1)
+            if meets_target(rating, target):
+                total_score += risks[index]
+                credit_score_sum += credits[index]
+                remaining += 1
+            else:
+                still_removed.append(index)
+        return still_removed